@@ -0,0 +1,210 @@
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import posixpath
+import re
+import tempfile
+
+from compression import (
+    compress,
+    is_compressible,
+    ENCODING_SUFFIXES,
+    ENCODINGS,
+    MIN_COMPRESS_BYTES,
+)
+
+load_dotenv()
+
+ASSETS_DIR = "static/assets"
+ASSETS_URL = "/static/assets"
+
+# Written by `python manage.py build-assets`; without it (or when it is
+# older than the files) the manifest is computed in memory on first use.
+ASSET_MANIFEST_PATH = os.getenv("ASSET_MANIFEST_PATH", "static/dist/manifest.json")
+
+HASH_LENGTH = 10
+
+# Output of `python manage.py optimize-images` (gitignored), relative to
+# ASSETS_DIR, and the index describing the variants built for each image
+OPTIMIZED_IMAGE_DIR = "img/optimized"
+IMAGE_INDEX_PATH = os.path.join(ASSETS_DIR, OPTIMIZED_IMAGE_DIR, "images.json")
+
+# Precompressed siblings (main.css.br, main.css.gz) written by build-assets
+PRECOMPRESSED_SUFFIXES = tuple(ENCODING_SUFFIXES.values())
+
+# css/main.3f2a1b9c0d.css -> (css/main, 3f2a1b9c0d, .css)
+FINGERPRINT_RE = re.compile(
+    r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[A-Za-z0-9]+)$" % HASH_LENGTH
+)
+
+
+# -----------------------------
+# Manifest Build
+# -----------------------------
+def fingerprint(relpath: str, digest: str) -> str:
+    stem, ext = posixpath.splitext(relpath)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def _asset_files(assets_dir: str):
+    """Yield (relpath, full path) for every servable file under assets_dir."""
+    for root, dirs, files in os.walk(assets_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith(".") or name.endswith(PRECOMPRESSED_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, assets_dir).replace(os.sep, "/"), path
+
+
+def hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def build_manifest(assets_dir: str = ASSETS_DIR) -> dict:
+    """Map each asset's relative path to its content-hashed name."""
+    return {
+        relpath: fingerprint(relpath, hash_file(path))
+        for relpath, path in _asset_files(assets_dir)
+    }
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".build-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates files readable by the owner only
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_bytes(path: str, data: bytes) -> None:
+    _atomic_write(path, data)
+
+
+def write_text(path: str, text: str) -> None:
+    _atomic_write(path, text.encode())
+
+
+def write_json(data: dict, path: str) -> None:
+    """Atomically replace a JSON build file."""
+    _atomic_write(path, json.dumps(data, indent=2, sort_keys=True).encode())
+
+
+def write_manifest(manifest: dict, path: str = ASSET_MANIFEST_PATH) -> None:
+    write_json(manifest, path)
+
+
+def precompress_assets(assets_dir: str = ASSETS_DIR) -> dict:
+    """
+    Write .br/.gz siblings for every compressible asset, once, at maximum
+    compression. A sibling that would not be meaningfully smaller is
+    removed instead, so the static handler falls back to the original.
+    Returns {encoding: [files, original bytes, compressed bytes]}.
+    """
+    totals = {encoding: [0, 0, 0] for encoding in ENCODINGS}
+    for _, path in _asset_files(assets_dir):
+        if not is_compressible(path):
+            continue
+        with open(path, "rb") as f:
+            data = f.read()
+        for encoding in ENCODINGS:
+            sibling = path + ENCODING_SUFFIXES[encoding]
+            body = compress(data, encoding) if len(data) >= MIN_COMPRESS_BYTES else data
+            if len(body) > len(data) * 0.9:
+                if os.path.exists(sibling):
+                    os.unlink(sibling)
+                continue
+            _atomic_write(sibling, body)
+            totals[encoding][0] += 1
+            totals[encoding][1] += len(data)
+            totals[encoding][2] += len(body)
+    return totals
+
+
+# -----------------------------
+# Runtime Manifest
+# -----------------------------
+class AssetManifest:
+    """
+    Fingerprinted asset URLs for templates, and the reverse lookup the
+    static file handler uses to serve them. Fingerprinted names are
+    virtual: the file on disk keeps its original name, so relative url()
+    references inside vendor CSS keep working.
+    """
+
+    def __init__(self, assets_dir: str, manifest_path: str):
+        self.assets_dir = assets_dir
+        self.manifest_path = manifest_path
+        self.files = None
+        self.originals = {}
+
+    def _is_stale(self) -> bool:
+        built = os.path.getmtime(self.manifest_path)
+        return any(
+            os.path.getmtime(path) > built for _, path in _asset_files(self.assets_dir)
+        )
+
+    def load(self) -> None:
+        files = None
+        if os.path.exists(self.manifest_path):
+            if self._is_stale():
+                print("[WARN] Asset manifest is older than the assets; rebuilding in memory.")
+            else:
+                with open(self.manifest_path) as f:
+                    files = json.load(f)
+        self.files = files if files is not None else build_manifest(self.assets_dir)
+        self.originals = {hashed: relpath for relpath, hashed in self.files.items()}
+
+    def _ensure_loaded(self):
+        if self.files is None:
+            self.load()
+
+    def url(self, relpath: str) -> str:
+        self._ensure_loaded()
+        return f"{ASSETS_URL}/{self.files.get(relpath, relpath)}"
+
+    def resolve(self, hashed: str) -> str | None:
+        """Original relative path for a current fingerprinted name."""
+        self._ensure_loaded()
+        return self.originals.get(hashed)
+
+
+asset_manifest = AssetManifest(ASSETS_DIR, ASSET_MANIFEST_PATH)
+
+
+def asset_url(path: str) -> str:
+    """Jinja global: asset_url('css/main.css') -> /static/assets/css/main.<hash>.css"""
+    return asset_manifest.url(path.lstrip("/"))
+
+
+# -----------------------------
+# Optimized Site Images
+# -----------------------------
+_image_index = {"mtime": None, "images": {}}
+
+
+def optimized_image(path: str) -> dict | None:
+    """
+    Jinja global: the variants optimize-images built for a bundled image
+    ('img/logo.png'), or None when they have not been built.
+    """
+    try:
+        mtime = os.path.getmtime(IMAGE_INDEX_PATH)
+    except OSError:
+        return None
+    if mtime != _image_index["mtime"]:
+        with open(IMAGE_INDEX_PATH) as f:
+            _image_index["images"] = json.load(f)
+        _image_index["mtime"] = mtime
+    return _image_index["images"].get(path.lstrip("/"))
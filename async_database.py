@@ -0,0 +1,25 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI")
+MONGO_DB = os.getenv("MONGO_DB", "portfolio_db")
+
+# Collections
+CONTACT_COLLECTION = os.getenv("CONTACT_COLLECTION", "contacts")
+ADMIN_COLLECTION = os.getenv("ADMIN_COLLECTION", "admins")
+PROJECTS_COLLECTION = os.getenv("PROJECTS_COLLECTION", "projects")
+# Change counters shared by every app worker (see project_cache.py)
+CACHE_VERSION_COLLECTION = os.getenv("CACHE_VERSION_COLLECTION", "cache_versions")
+
+# Async client used by the FastAPI routes; database.py keeps the
+# synchronous client for scripts that run outside the event loop.
+client = AsyncIOMotorClient(MONGO_URI)
+db = client[MONGO_DB]
+
+contact_collection = db[CONTACT_COLLECTION]
+admin_collection = db[ADMIN_COLLECTION]
+projects_collection = db[PROJECTS_COLLECTION]
+cache_version_collection = db[CACHE_VERSION_COLLECTION]
@@ -0,0 +1,88 @@
+"""
+Benchmark the /admin/messages total-count strategies.
+
+Seeds a scratch database with synthetic contact messages, then times the
+count step of the dashboard for every mode in counting.COUNT_MODES, both
+for the unfiltered view and for a repeated search, next to the cost of
+fetching the page itself.
+
+Usage:
+    python benchmarks/bench_dashboard.py [10000 100000 1000000]
+
+Uses MONGO_URI from .env and the MONGO_BENCH_DB database (default
+"portfolio_bench"), which is dropped when the run finishes. Needs a real
+MongoDB server; record the output in benchmarks/README.md.
+"""
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_search import connect, seed, SEARCH_TERMS  # noqa: E402
+from counting import count_messages, invalidate_message_counts, COUNT_MODES  # noqa: E402
+from pagination import build_page_pipeline  # noqa: E402
+from search import build_message_search, REGEX_MODE  # noqa: E402
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI")
+BENCH_DB = os.getenv("MONGO_BENCH_DB", "portfolio_bench")
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+REPEAT = 5
+
+
+async def best_ms(func) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+async def bench_size(collection, size: int) -> None:
+    views = [("unfiltered", "")] + [(f"search '{t}'", t) for t in SEARCH_TERMS]
+
+    for label, term in views:
+        query, sort = build_message_search(term, REGEX_MODE)
+        pipeline = build_page_pipeline(query, sort, None, False, 10)
+
+        async def fetch_page():
+            await collection.aggregate(pipeline).to_list(None)
+
+        page_ms = await best_ms(fetch_page)
+        print(f"{size:>10} {label:<26} {'page only':<8} {page_ms:>10.1f}")
+
+        for mode in COUNT_MODES:
+            invalidate_message_counts()
+
+            async def count():
+                await count_messages(collection, query, mode)
+
+            # "auto" is warm after the first repeat, which is the point
+            count_ms = await best_ms(count)
+            print(f"{size:>10} {label:<26} {mode:<8} {page_ms + count_ms:>10.1f}")
+
+
+async def main(sizes: list[int]) -> None:
+    # Seeding is synchronous; reuse the pymongo helpers from bench_search
+    sync_client = connect()
+    client = AsyncIOMotorClient(MONGO_URI)
+    collection = client[BENCH_DB]["contacts"]
+
+    print(f"{'size':>10} {'view':<26} {'count':<8} {'best ms':>10}")
+    for size in sizes:
+        print(f"[INFO] Seeding {size} messages...")
+        seed(sync_client[BENCH_DB]["contacts"], size)
+        await bench_size(collection, size)
+
+    await client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES))
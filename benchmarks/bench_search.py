@@ -0,0 +1,146 @@
+"""
+Benchmark the admin message search: regex $or scan vs text index.
+
+Seeds a scratch database with synthetic contact messages and times the
+first dashboard page for both query shapes produced by
+search.build_message_search, together with the number of documents
+MongoDB had to examine.
+
+Usage:
+    python benchmarks/bench_search.py [10000 100000 1000000]
+
+Uses MONGO_URI from .env and the MONGO_BENCH_DB database (default
+"portfolio_bench"), which is dropped and re-seeded for every size. Needs a
+real MongoDB server (mongomock ignores indexes); record the output in
+benchmarks/README.md.
+"""
+from datetime import datetime, timedelta
+from pymongo import MongoClient, IndexModel, DESCENDING, TEXT
+from pymongo.errors import PyMongoError
+from dotenv import load_dotenv
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pagination import build_page_pipeline  # noqa: E402
+from search import (  # noqa: E402
+    build_message_search,
+    SEARCH_FIELDS,
+    SEARCH_WEIGHTS,
+    TEXT_MODE,
+    REGEX_MODE,
+)
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI")
+BENCH_DB = os.getenv("MONGO_BENCH_DB", "portfolio_bench")
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SEARCH_TERMS = ["invoice", "website redesign", "fastapi"]
+REPEAT = 5
+BATCH = 10_000
+
+WORDS = (
+    "project website design backend api mongodb quote budget deadline "
+    "freelance logo branding mobile app meeting invoice payment update "
+    "fastapi python bug feature hosting domain email redesign support"
+).split()
+
+
+def connect(uri: str = MONGO_URI) -> MongoClient:
+    """Connect to the benchmark server, exiting with a clear error if there is none."""
+    client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+    try:
+        version = client.server_info()["version"]
+    except PyMongoError as e:
+        reason = str(e).split(",")[0]
+        print(f"[ERROR] No MongoDB server at {uri or 'localhost:27017'}: {reason}")
+        sys.exit(2)
+    print(f"[INFO] MongoDB {version}")
+    return client
+
+
+def fake_message(i: int, now: datetime) -> dict:
+    words = random.choices(WORDS, k=40)
+    return {
+        "name": f"Visitor {i}",
+        "email": f"visitor{i}@example.com",
+        "subject": " ".join(random.choices(WORDS, k=4)),
+        "message": " ".join(words),
+        "created_at": now - timedelta(seconds=i),
+    }
+
+
+def seed(collection, size: int) -> None:
+    collection.drop()
+    now = datetime.utcnow()
+    for start in range(0, size, BATCH):
+        end = min(start + BATCH, size)
+        collection.insert_many([fake_message(i, now) for i in range(start, end)])
+    collection.create_indexes(
+        [
+            IndexModel(
+                [("created_at", DESCENDING), ("_id", DESCENDING)],
+                name="created_at_id_desc",
+            ),
+            IndexModel(
+                [(field, TEXT) for field in SEARCH_FIELDS],
+                name="message_text",
+                weights=SEARCH_WEIGHTS,
+            ),
+        ]
+    )
+
+
+def time_query(collection, term: str, mode: str, limit: int = 10):
+    query, sort = build_message_search(term, mode)
+    pipeline = build_page_pipeline(query, sort, None, False, limit)
+
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        collection.count_documents(query)
+        list(collection.aggregate(pipeline))
+        timings.append(time.perf_counter() - started)
+
+    explain = collection.database.command(
+        "explain",
+        {"aggregate": collection.name, "pipeline": pipeline, "cursor": {}},
+        verbosity="executionStats",
+    )
+    return min(timings) * 1000, docs_examined(explain)
+
+
+def docs_examined(explain: dict):
+    """Pull totalDocsExamined out of a find- or aggregate-shaped explain."""
+    if "executionStats" in explain:
+        return explain["executionStats"].get("totalDocsExamined", "?")
+    for stage in explain.get("stages", []):
+        cursor = stage.get("$cursor", {})
+        if "executionStats" in cursor:
+            return cursor["executionStats"].get("totalDocsExamined", "?")
+    return "?"
+
+
+def main(sizes: list[int]) -> None:
+    client = connect()
+    collection = client[BENCH_DB]["contacts"]
+
+    print(f"{'size':>10} {'term':<18} {'mode':<6} {'best ms':>10} {'docs examined':>14}")
+    for size in sizes:
+        print(f"[INFO] Seeding {size} messages...")
+        seed(collection, size)
+        for term in SEARCH_TERMS:
+            for mode in (REGEX_MODE, TEXT_MODE):
+                ms, examined = time_query(collection, term, mode)
+                print(f"{size:>10} {term:<18} {mode:<6} {ms:>10.1f} {examined:>14}")
+
+    client.drop_database(BENCH_DB)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,288 @@
+from dotenv import load_dotenv
+from markupsafe import Markup
+import glob
+import os
+import posixpath
+import re
+
+from assets import (
+    asset_url,
+    fingerprint,
+    optimized_image,
+    hash_file,
+    write_text,
+    ASSETS_DIR,
+    ASSETS_URL,
+)
+from purge import purge_css, CONTENT_TOKEN_RE, PURGE_CONTENT, PURGE_STYLESHEETS
+
+try:
+    import rjsmin
+    import rcssmin
+except ImportError:  # without them bundles are only concatenated
+    rjsmin = rcssmin = None
+
+load_dotenv()
+
+# Serve the separate source files instead of the bundles (for debugging
+# vendor code in the browser); also used while no bundle has been built
+ASSET_DEBUG = os.getenv("ASSET_DEBUG", "false").lower() in ("1", "true", "yes")
+
+# Written by `python manage.py build-assets`, relative to ASSETS_DIR
+BUNDLE_DIR = "bundles"
+
+# Above-the-fold CSS inlined into the homepage <head>: the rules the markup
+# from <body> through the hero section needs, taken from the CSS bundle
+CRITICAL_TEMPLATE = "templates/index.html"
+CRITICAL_FOLD_END = 'id="hero"'  # the fold ends with this element's section
+CRITICAL_CSS_PATH = "static/dist/critical.css"
+# Also painted before the bundle arrives: the full-screen #preloader (at the
+# end of <body>) covers the page until main.js removes it on load
+CRITICAL_EXTRA_NAMES = {"html", "preloader"}
+
+# Bundle name -> sources relative to ASSETS_DIR, in page order
+BUNDLES = {
+    "site.css": [
+        "vendor/bootstrap/css/bootstrap.min.css",
+        "vendor/bootstrap-icons/bootstrap-icons.css",
+        "vendor/aos/aos.css",
+        "vendor/glightbox/css/glightbox.min.css",
+        "vendor/swiper/swiper-bundle.min.css",
+        "css/main.css",
+    ],
+    "site.js": [
+        "vendor/bootstrap/js/bootstrap.bundle.min.js",
+        "vendor/php-email-form/validate.js",
+        "vendor/aos/aos.js",
+        "vendor/typed.js/typed.umd.js",
+        "vendor/waypoints/noframework.waypoints.js",
+        "vendor/purecounter/purecounter_vanilla.js",
+        "vendor/glightbox/js/glightbox.min.js",
+        "vendor/imagesloaded/imagesloaded.pkgd.min.js",
+        "vendor/isotope-layout/isotope.pkgd.min.js",
+        "vendor/swiper/swiper-bundle.min.js",
+        "js/main.js",
+    ],
+}
+
+SOURCE_MAP_RE = re.compile(r"^\s*(?://|/\*)# sourceMappingURL=.*$", re.MULTILINE)
+CHARSET_RE = re.compile(r'@charset\s+"[^"]*";')
+CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)(?P<url>.*?)\1\s*\)""")
+
+
+# -----------------------------
+# Build
+# -----------------------------
+def bundle_relpath(name: str) -> str:
+    return f"{BUNDLE_DIR}/{name}"
+
+
+def _rewrite_css_urls(css: str, relpath: str, assets_dir: str) -> str:
+    """
+    Point relative url()s at their fingerprinted location, since the
+    bundle lives in a different directory than the stylesheet did.
+    """
+    base = posixpath.dirname(relpath)
+
+    def replace(match):
+        url = match["url"]
+        if not url or url.startswith(("data:", "/", "#")) or "://" in url:
+            return match.group(0)
+        path, _, fragment = url.partition("#")
+        target = posixpath.normpath(posixpath.join(base, path.split("?")[0]))
+        full_path = os.path.join(assets_dir, *target.split("/"))
+        if not os.path.isfile(full_path):
+            print(f"[WARN] {relpath}: url({url}) not found; left as is.")
+            return match.group(0)
+        # The fingerprint replaces the cache-busting query string
+        href = f"{ASSETS_URL}/{fingerprint(target, hash_file(full_path))}"
+        if fragment:
+            href += f"#{fragment}"
+        return f'url("{href}")'
+
+    return CSS_URL_RE.sub(replace, css)
+
+
+def _minify(source: str, relpath: str) -> str:
+    if rjsmin is None or ".min." in posixpath.basename(relpath):
+        return source
+    if relpath.endswith(".css"):
+        return rcssmin.cssmin(source, keep_bang_comments=True)
+    return rjsmin.jsmin(source, keep_bang_comments=True)
+
+
+def build_bundle(
+    name: str, sources: list, assets_dir: str = ASSETS_DIR, replaced: dict = None
+) -> tuple:
+    """
+    Concatenate (and minify) the sources of one bundle into
+    ASSETS_DIR/bundles/<name>. replaced maps a source to the text to use
+    instead of the file (purged CSS). Returns (source bytes, bundle bytes).
+    """
+    parts, source_bytes = [], 0
+    for relpath in sources:
+        with open(os.path.join(assets_dir, *relpath.split("/")), encoding="utf-8") as f:
+            source = f.read()
+        source_bytes += len(source.encode())
+        source = (replaced or {}).get(relpath, source)
+        source = SOURCE_MAP_RE.sub("", source)
+        if name.endswith(".css"):
+            # @charset is only valid as the very first rule of the bundle
+            source = CHARSET_RE.sub("", source)
+            source = _rewrite_css_urls(source, relpath, assets_dir)
+        parts.append(_minify(source, relpath).strip())
+
+    if name.endswith(".css"):
+        bundle = '@charset "UTF-8";\n' + "\n".join(parts) + "\n"
+    else:
+        # A file without a trailing semicolon must not run into the next one
+        bundle = ";\n".join(parts) + ";\n"
+    write_text(os.path.join(assets_dir, BUNDLE_DIR, name), bundle)
+    return source_bytes, len(bundle.encode())
+
+
+def build_bundles(assets_dir: str = ASSETS_DIR, replaced: dict = None) -> dict:
+    """Build every bundle. Returns {name: (source bytes, bundle bytes)}."""
+    if rjsmin is None:
+        print("[WARN] rjsmin/rcssmin not installed; bundles are concatenated but not minified.")
+    return {
+        name: build_bundle(name, sources, assets_dir, replaced)
+        for name, sources in BUNDLES.items()
+    }
+
+
+def _fold_markup(template: str = CRITICAL_TEMPLATE) -> str:
+    with open(template, encoding="utf-8") as f:
+        html = f.read()
+    start = html.index("<body")
+    end = html.index("</section>", html.index(CRITICAL_FOLD_END))
+    return html[start:end]
+
+
+def build_critical_css(name: str = "site.css", assets_dir: str = ASSETS_DIR) -> tuple:
+    """
+    Purge the built CSS bundle down to the rules the above-the-fold markup
+    uses and write it to CRITICAL_CSS_PATH. Returns (bundle bytes,
+    critical bytes).
+    """
+    relpath = bundle_relpath(name)
+    with open(os.path.join(assets_dir, *relpath.split("/")), encoding="utf-8") as f:
+        bundle = f.read()
+    fold = set(CONTENT_TOKEN_RE.findall(_fold_markup())) | CRITICAL_EXTRA_NAMES
+    css = purge_css(CHARSET_RE.sub("", bundle), fold, strict=True)
+    if rcssmin is not None:
+        css = rcssmin.cssmin(css, keep_bang_comments=False)
+    write_text(CRITICAL_CSS_PATH, css)
+    return len(bundle.encode()), len(css.encode())
+
+
+# -----------------------------
+# Templates
+# -----------------------------
+_bundle_ready = {}
+_critical = {"mtime": None, "css": None}
+
+
+def _inputs(name: str) -> list:
+    """Files a bundle depends on, including the content its CSS was purged against."""
+    paths = [os.path.join(ASSETS_DIR, *src.split("/")) for src in BUNDLES[name]]
+    if set(BUNDLES[name]) & set(PURGE_STYLESHEETS):
+        paths.extend(path for pattern in PURGE_CONTENT for path in glob.glob(pattern))
+    return paths
+
+
+def _is_built(name: str) -> bool:
+    """Whether the bundle has been built since its inputs last changed."""
+    if name not in _bundle_ready:
+        relpath = bundle_relpath(name)
+        try:
+            built = os.path.getmtime(os.path.join(ASSETS_DIR, *relpath.split("/")))
+            ready = all(os.path.getmtime(path) <= built for path in _inputs(name))
+        except OSError:
+            ready = False
+        if not ready:
+            print(f"[WARN] Bundle {name} is missing or stale; serving its source files.")
+        _bundle_ready[name] = ready
+    return _bundle_ready[name]
+
+
+def critical_css(name: str = "site.css") -> str | None:
+    """The inlined CSS, or None when it is missing or older than the bundle."""
+    bundle = os.path.join(ASSETS_DIR, *bundle_relpath(name).split("/"))
+    try:
+        mtime = os.path.getmtime(CRITICAL_CSS_PATH)
+        if mtime < os.path.getmtime(bundle):
+            return None
+    except OSError:
+        return None
+    if mtime != _critical["mtime"]:
+        with open(CRITICAL_CSS_PATH, encoding="utf-8") as f:
+            # Nothing in a stylesheet may close the <style> element early
+            _critical["css"] = f.read().replace("</", "<\\/")
+        _critical["mtime"] = mtime
+    return _critical["css"]
+
+
+def _tag(relpath: str) -> str:
+    if relpath.endswith(".css"):
+        return f'<link href="{asset_url(relpath)}" rel="stylesheet" />'
+    # defer: download in parallel, run in order once the document is parsed
+    return f'<script src="{asset_url(relpath)}" defer></script>'
+
+
+def _async_stylesheet(relpath: str, css: str) -> str:
+    """Inline critical CSS and load the full stylesheet without blocking render."""
+    href = asset_url(relpath)
+    return (
+        f"<style>{css}</style>\n"
+        f'    <link href="{href}" rel="preload" as="style" '
+        f"onload=\"this.onload=null;this.rel='stylesheet'\" />\n"
+        f'    <noscript><link href="{href}" rel="stylesheet" /></noscript>'
+    )
+
+
+def asset_bundle(name: str, critical: bool = False) -> Markup:
+    """
+    Jinja global: {{ asset_bundle('site.css') }} emits one tag for the
+    fingerprinted bundle, or one tag per source file with ASSET_DEBUG or
+    when build-assets has not been run since the sources changed. Scripts
+    are deferred. With critical=True a built CSS bundle is loaded
+    asynchronously behind the inlined above-the-fold CSS.
+    """
+    if ASSET_DEBUG or not _is_built(name):
+        relpaths = BUNDLES[name]
+    else:
+        relpaths = [bundle_relpath(name)]
+        css = critical_css(name) if critical else None
+        if css:
+            return Markup(_async_stylesheet(relpaths[0], css))
+    return Markup("\n    ".join(_tag(relpath) for relpath in relpaths))
+
+
+def preload_links(images: dict) -> str:
+    """
+    Link header value preloading the built bundles and the given bundled
+    images ({path: sizes attribute}), so their downloads start before the
+    HTML is parsed. Optimized images are preloaded as their AVIF (or WebP)
+    srcset with a type, which browsers that cannot decode it skip.
+    """
+    links = []
+    for name, kind in (("site.css", "style"), ("site.js", "script")):
+        if not ASSET_DEBUG and _is_built(name):
+            links.append(f"<{asset_url(bundle_relpath(name))}>; rel=preload; as={kind}")
+    for path, sizes in images.items():
+        image = optimized_image(path)
+        if image is None:
+            links.append(f"<{asset_url(path)}>; rel=preload; as=image; fetchpriority=high")
+            continue
+        for fmt in ("avif", "webp"):
+            variants = image["sources"].get(fmt)
+            if variants:
+                srcset = ", ".join(f"{asset_url(v['path'])} {v['width']}w" for v in variants)
+                links.append(
+                    f"<{asset_url(variants[-1]['path'])}>; rel=preload; as=image; "
+                    f'type="image/{fmt}"; imagesrcset="{srcset}"; imagesizes="{sizes}"; '
+                    "fetchpriority=high"
+                )
+                break
+    return ", ".join(links)
@@ -0,0 +1,213 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from dotenv import load_dotenv
+import gzip
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+load_dotenv()
+
+# Text formats worth compressing; images, fonts like woff2 and PDFs are
+# already compressed and only get bigger.
+COMPRESSIBLE_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".json", ".map", ".svg", ".html", ".txt", ".xml",
+    ".ttf", ".eot", ".ico",
+}
+
+# Preferred first
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+# Smaller bodies are not worth the compression overhead
+MIN_COMPRESS_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 512))
+
+# Response Content-Types the middleware compresses
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/manifest+json",
+    "image/svg+xml",
+)
+
+
+# -----------------------------
+# Negotiation
+# -----------------------------
+def is_compressible(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def accepted_encodings(header: str) -> set:
+    """
+    Codings the client accepts (q > 0) from an Accept-Encoding header. "*"
+    stands for every coding the header does not name itself, so
+    "gzip;q=0, *" still refuses gzip.
+    """
+    accepted, refused = set(), set()
+    for item in header.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            (accepted if q > 0 else refused).add(coding)
+    if "*" in accepted:
+        accepted.update(set(ENCODINGS) - refused)
+    return accepted - refused
+
+
+def choose_encodings(header: str) -> list:
+    """Encodings we support that the client accepts, best first."""
+    accepted = accepted_encodings(header or "")
+    return [encoding for encoding in ENCODINGS if encoding in accepted]
+
+
+def compress(data: bytes, encoding: str, level: str = "max") -> bytes:
+    """
+    Compress data for a Content-Encoding. 'max' is for build steps where
+    CPU time does not matter; 'fast' is for compressing per response.
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if level == "max" else 5)
+    if encoding == "gzip":
+        # mtime=0 keeps the output byte-for-byte reproducible
+        return gzip.compress(data, compresslevel=9 if level == "max" else 6, mtime=0)
+    raise ValueError(f"Unsupported encoding '{encoding}'.")
+
+
+# -----------------------------
+# Compressors
+# -----------------------------
+class StreamCompressor:
+    """Incremental compressor for one response body."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=5)
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # gzip wrapper
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+# -----------------------------
+# ASGI Middleware
+# -----------------------------
+class CompressionMiddleware:
+    """
+    Compress text responses with brotli or gzip per Accept-Encoding.
+
+    Pure ASGI, so streamed bodies are compressed chunk by chunk instead
+    of being buffered. Responses that already carry a Content-Encoding
+    (precompressed assets, cached pages) pass through untouched, as do
+    bodies smaller than minimum_size.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_COMPRESS_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encodings = choose_encodings(Headers(scope=scope).get("accept-encoding"))
+        responder = _CompressingSend(
+            send, encodings[0] if encodings else None, self.minimum_size
+        )
+        await self.app(scope, receive, responder)
+
+
+class _CompressingSend:
+    """Wraps send(): holds back the response start until the body is seen."""
+
+    def __init__(self, send: Send, encoding: str | None, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+
+    def _should_compress(self, headers: MutableHeaders, size: int, more: bool) -> bool:
+        if self.start["status"] < 200 or self.start["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            return False
+        if more:
+            # Streamed: trust a declared length if there is one
+            length = headers.get("content-length")
+            return length is None or int(length) >= self.minimum_size
+        return size >= self.minimum_size
+
+    async def _send_start(self) -> None:
+        if self.start is not None:
+            await self.send(self.start)
+            self.start = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = MutableHeaders(scope=self.start)
+            compress = self._should_compress(headers, len(body), more)
+            if compress and "accept-encoding" not in headers.get("vary", "").lower():
+                # The representation depends on Accept-Encoding from here on
+                headers.add_vary_header("Accept-Encoding")
+            if not compress or self.encoding is None:
+                self.passthrough = True
+                await self._send_start()
+                await self.send(message)
+                return
+
+            self.compressor = StreamCompressor(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Compressed bytes differ from the tagged ones
+                headers["ETag"] = f"W/{etag}"
+            if not more:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send_start()
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            del headers["Content-Length"]
+            await self._send_start()
+
+        chunk = self.compressor.compress(body)
+        if not more:
+            chunk += self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more})
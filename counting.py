@@ -0,0 +1,95 @@
+from bson import json_util
+from dotenv import load_dotenv
+import os
+import time
+
+from search import SEARCH_MAX_TIME_MS
+
+load_dotenv()
+
+# How /admin/messages computes its total:
+#   auto  - estimated_document_count for the unfiltered view, TTL-cached
+#           count_documents for searches (default)
+#   exact - uncached count_documents on every request
+#   none  - no total at all; the dashboard relies on "has next page"
+COUNT_MODES = ("auto", "exact", "none")
+MESSAGE_COUNT_MODE = os.getenv("MESSAGE_COUNT_MODE", "auto")
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", 60))
+COUNT_CACHE_SIZE = 256
+
+
+# -----------------------------
+# TTL Count Cache
+# -----------------------------
+class CountCache:
+    """
+    Small in-process TTL cache of search counts.
+
+    invalidate() bumps a generation number so a count that was started
+    before a write cannot be stored after it.
+    """
+
+    def __init__(self, ttl: int, max_size: int = COUNT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.generation = 0
+        self._entries = {}
+
+    def get(self, key: str) -> int | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: int, generation: int) -> None:
+        if generation != self.generation:
+            return
+        if len(self._entries) >= self.max_size:
+            # Evict the oldest entry (dicts keep insertion order)
+            self._entries.pop(next(iter(self._entries)))
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+
+message_counts = CountCache(COUNT_CACHE_TTL)
+
+
+def invalidate_message_counts() -> None:
+    """Drop cached search totals; call after inserting or deleting a message."""
+    message_counts.invalidate()
+
+
+# -----------------------------
+# Counting Strategy
+# -----------------------------
+async def count_messages(collection, query: dict, mode: str = MESSAGE_COUNT_MODE):
+    """
+    Return the number of messages matching `query` according to `mode`,
+    or None when exact totals are disabled.
+    """
+    if mode == "none":
+        return None
+
+    if mode == "exact":
+        return await collection.count_documents(query, maxTimeMS=SEARCH_MAX_TIME_MS)
+
+    if not query:
+        # Collection metadata lookup, no scan
+        return await collection.estimated_document_count()
+
+    key = json_util.dumps(query, sort_keys=True)
+    cached = message_counts.get(key)
+    if cached is not None:
+        return cached
+
+    generation = message_counts.generation
+    total = await collection.count_documents(query, maxTimeMS=SEARCH_MAX_TIME_MS)
+    message_counts.set(key, total, generation)
+    return total
@@ -11,6 +11,8 @@ MONGO_DB = os.getenv("MONGO_DB", "portfolio_db")
 CONTACT_COLLECTION = os.getenv("CONTACT_COLLECTION", "contacts")
 ADMIN_COLLECTION = os.getenv("ADMIN_COLLECTION", "admins")
 PROJECTS_COLLECTION = os.getenv("PROJECTS_COLLECTION", "projects")
+# Change counters shared by every app worker (see project_cache.py)
+CACHE_VERSION_COLLECTION = os.getenv("CACHE_VERSION_COLLECTION", "cache_versions")
 
 client = MongoClient(MONGO_URI)
 db = client[MONGO_DB]
@@ -18,3 +20,4 @@ db = client[MONGO_DB]
 contact_collection = db[CONTACT_COLLECTION]
 admin_collection = db[ADMIN_COLLECTION]
 projects_collection = db[PROJECTS_COLLECTION]
+cache_version_collection = db[CACHE_VERSION_COLLECTION]
@@ -1,11 +1,11 @@
 from fastapi import Request, HTTPException, status
 from jose import JWTError
 from auth import decode_access_token
-from database import admin_collection
+from async_database import admin_collection
 import traceback
 
 
-def get_current_admin(request: Request):
+async def get_current_admin(request: Request):
     """
     Dependency that ensures the admin is authenticated using JWT from cookies.
     Extracts the access_token cookie, verifies it, and returns the admin username.
@@ -27,7 +27,7 @@ def get_current_admin(request: Request):
                 detail="Invalid or expired token. Please log in again.",
             )
 
-        admin = admin_collection.find_one({"username": username})
+        admin = await admin_collection.find_one({"username": username})
         if not admin:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
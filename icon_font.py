@@ -0,0 +1,118 @@
+import io
+import json
+import logging
+import os
+import re
+
+from assets import write_bytes, write_text, ASSETS_DIR
+from purge import content_tokens
+
+try:
+    from fontTools import subset
+except ImportError:  # only needed by build-assets
+    subset = None
+
+try:
+    import brotli  # noqa: F401  fontTools needs it to write WOFF2
+except ImportError:
+    brotli = None
+
+# Bootstrap Icons, relative to ASSETS_DIR
+ICONS_DIR = "vendor/bootstrap-icons"
+ICON_STYLESHEET = f"{ICONS_DIR}/bootstrap-icons.css"
+ICON_MAP = f"{ICONS_DIR}/bootstrap-icons.json"  # icon name -> codepoint
+ICON_FONT_SOURCE = f"{ICONS_DIR}/fonts/bootstrap-icons.woff"  # zlib; readable without brotli
+
+# Written by build-assets next to the originals, so the relative url()s in
+# the trimmed stylesheet resolve the same way
+SUBSET_STYLESHEET = f"{ICONS_DIR}/bootstrap-icons.subset.css"
+SUBSET_FONTS = {
+    "woff2": f"{ICONS_DIR}/fonts/bootstrap-icons.subset.woff2",
+    "woff": f"{ICONS_DIR}/fonts/bootstrap-icons.subset.woff",
+}
+
+ICON_CLASS_RE = re.compile(r"^bi-([a-z0-9-]+)$")
+ICON_RULE_RE = re.compile(r'^\.bi-(?P<name>[a-z0-9-]+)::before \{ content: "[^"]*"; \}\n', re.M)
+FONT_SRC_RE = re.compile(r"src: [^;]*;")
+
+
+def _path(relpath: str, assets_dir: str) -> str:
+    return os.path.join(assets_dir, *relpath.split("/"))
+
+
+# -----------------------------
+# Used Icons
+# -----------------------------
+def used_icons(assets_dir: str = ASSETS_DIR) -> dict:
+    """{name: codepoint} for every bi-* class the templates and main.js mention."""
+    with open(_path(ICON_MAP, assets_dir)) as f:
+        icon_map = json.load(f)
+    used = {}
+    for token in content_tokens():
+        match = ICON_CLASS_RE.match(token)
+        if match and match[1] in icon_map:
+            used[match[1]] = icon_map[match[1]]
+    return used
+
+
+# -----------------------------
+# Subsetting
+# -----------------------------
+def _subset_font(src: str, codepoints: list, flavor: str) -> bytes:
+    options = subset.Options()
+    options.flavor = flavor
+    options.layout_features = []
+    font = subset.load_font(src, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    buffer = io.BytesIO()
+    subset.save_font(font, buffer, options)
+    return buffer.getvalue()
+
+
+def _trim_stylesheet(css: str, names: set, flavors: list) -> str:
+    """Keep only the used icon rules and point @font-face at the subset fonts."""
+    css = ICON_RULE_RE.sub(lambda m: m.group(0) if m["name"] in names else "", css)
+    # No cache-busting query: the asset manifest fingerprints the fonts
+    src = ",\n".join(
+        f'url("./fonts/bootstrap-icons.subset.{flavor}") format("{flavor}")'
+        for flavor in flavors
+    )
+    return FONT_SRC_RE.sub(lambda m: f"src: {src};", css, count=1)
+
+
+def subset_icon_font(assets_dir: str = ASSETS_DIR) -> dict:
+    """
+    Subset the Bootstrap Icons font to the glyphs the site uses and write
+    the fonts and the trimmed stylesheet next to the originals.
+    Returns {relpath: (original bytes, subset bytes)} for each output.
+    """
+    if subset is None:
+        raise RuntimeError("Subsetting the icon font requires fontTools (pip install fonttools).")
+    # The upstream font trips harmless warnings in fontTools' table parser
+    logging.getLogger("fontTools").setLevel(logging.ERROR)
+    icons = used_icons(assets_dir)
+    codepoints = sorted(icons.values())
+    flavors = ["woff2", "woff"] if brotli else ["woff"]
+    if brotli is None:
+        print("[WARN] brotli not installed; writing the WOFF subset only.")
+
+    report = {}
+    for flavor in flavors:
+        data = _subset_font(_path(ICON_FONT_SOURCE, assets_dir), codepoints, flavor)
+        write_bytes(_path(SUBSET_FONTS[flavor], assets_dir), data)
+        original = _path(f"{ICONS_DIR}/fonts/bootstrap-icons.{flavor}", assets_dir)
+        report[SUBSET_FONTS[flavor]] = (os.path.getsize(original), len(data))
+
+    with open(_path(ICON_STYLESHEET, assets_dir), encoding="utf-8") as f:
+        original_css = f.read()
+    css = _trim_stylesheet(original_css, set(icons), flavors)
+    write_text(_path(SUBSET_STYLESHEET, assets_dir), css)
+    report[SUBSET_STYLESHEET] = (len(original_css.encode()), len(css.encode()))
+    return report
+
+
+def subset_stylesheet(assets_dir: str = ASSETS_DIR) -> str:
+    with open(_path(SUBSET_STYLESHEET, assets_dir), encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,219 @@
+from PIL import Image, ImageOps
+import os
+
+try:
+    import pillow_avif  # noqa: F401  registers AVIF on Pillow builds without it
+except ImportError:
+    pass
+
+# Widths generated for every uploaded project image. Sources narrower than a
+# width are never upscaled; the original width is used as the last variant.
+VARIANT_WIDTHS = [320, 640, 1024, 1600]
+
+# Output formats: WebP for browsers that support it, JPEG as the fallback
+VARIANT_FORMATS = {
+    "webp": ("WEBP", ".webp", {"quality": 80, "method": 6}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def _flatten(img: Image.Image) -> Image.Image:
+    """Convert to RGB, compositing any transparency onto white (for JPEG)."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _target_widths(source_width: int) -> list:
+    """Distinct widths to build, narrowest first (a 1920px source stops at 1600)."""
+    widths = [w for w in VARIANT_WIDTHS if w < source_width]
+    return sorted({*widths, min(source_width, VARIANT_WIDTHS[-1])})
+
+
+# -----------------------------
+# Variant Pipeline
+# -----------------------------
+def process_image(src_path: str, out_dir: str, stem: str) -> dict:
+    """
+    Produce resized WebP and JPEG variants of an uploaded image.
+
+    The image is rotated according to its EXIF orientation and then
+    re-encoded without any metadata, so EXIF (GPS, camera, ...) never
+    reaches the public site.
+
+    Returns variant metadata, with files written to out_dir:
+        {"webp": [{"width", "height", "filename"}, ...], "jpeg": [...]}
+    ordered from narrowest to widest.
+    """
+    variants = {name: [] for name in VARIANT_FORMATS}
+
+    with Image.open(src_path) as source:
+        source = ImageOps.exif_transpose(source)
+        rgb = _flatten(source)
+        rgba = source.convert("RGBA") if source.mode in ("RGBA", "LA") else None
+
+        for width in _target_widths(source.width):
+            height = max(1, round(source.height * width / source.width))
+            resized_rgb = rgb.resize((width, height), Image.LANCZOS)
+            resized_rgba = rgba.resize((width, height), Image.LANCZOS) if rgba else None
+
+            for name, (fmt, ext, options) in VARIANT_FORMATS.items():
+                # WebP keeps transparency; JPEG gets the flattened copy
+                resized = resized_rgba if (name == "webp" and rgba) else resized_rgb
+
+                filename = f"{stem}-{width}{ext}"
+                resized.save(os.path.join(out_dir, filename), fmt, **options)
+                variants[name].append(
+                    {"width": width, "height": height, "filename": filename}
+                )
+
+    return variants
+
+
+# -----------------------------
+# Stored Originals
+# -----------------------------
+# Image.info keys that only affect how the pixels render; any other key
+# (exif, xmp, PNG text chunks, comments, ...) is metadata to strip
+RENDERING_INFO_KEYS = {
+    "icc_profile", "transparency", "gamma", "srgb", "chromaticity", "dpi",
+    "aspect", "interlace", "background", "loop", "duration", "progressive",
+    "progression", "jfif", "jfif_version", "jfif_unit", "jfif_density",
+    "adobe", "adobe_transform",
+}
+
+ORIENTATION_TAG = 0x0112
+
+# Re-encoding settings per source format, close to lossless
+ORIGINAL_SAVE_OPTIONS = {
+    "JPEG": {"quality": 95, "optimize": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"quality": 95, "method": 6},
+}
+
+
+def is_supported_image(path: str) -> bool:
+    """
+    Whether a file is a PNG, JPEG or WebP image Pillow can open. Only the
+    header is read, so this is cheap enough for the request path.
+    """
+    try:
+        with Image.open(path) as source:
+            return source.format in ORIGINAL_SAVE_OPTIONS
+    except (OSError, Image.DecompressionBombError):
+        return False
+
+
+def strip_metadata(path: str) -> bool:
+    """
+    Rewrite an uploaded original in place without EXIF/XMP/text metadata,
+    applying its EXIF orientation first. Files without metadata are left
+    byte-for-byte untouched. Returns whether the file was rewritten.
+    """
+    with Image.open(path) as source:
+        fmt = source.format
+        if fmt not in ORIGINAL_SAVE_OPTIONS or set(source.info) <= RENDERING_INFO_KEYS:
+            return False
+
+        options = dict(ORIGINAL_SAVE_OPTIONS[fmt])
+        if fmt == "JPEG" and source.getexif().get(ORIENTATION_TAG, 1) == 1:
+            # Upright JPEGs keep their quantization tables (no generation loss)
+            image = source
+            options = {"quality": "keep", "subsampling": "keep"}
+        else:
+            image = ImageOps.exif_transpose(source)
+        for key in set(image.info) - RENDERING_INFO_KEYS:
+            del image.info[key]  # some encoders copy info (e.g. exif) by default
+        if "icc_profile" in source.info:
+            options["icc_profile"] = source.info["icc_profile"]
+
+        tmp_path = f"{path}.strip"
+        image.save(tmp_path, fmt, **options)
+    os.replace(tmp_path, path)
+    return True
+
+
+# -----------------------------
+# Bundled Site Images (build time)
+# -----------------------------
+# Widths built for images under static/assets/img, capped at the source width
+SITE_IMAGE_WIDTHS = [480, 960, 1600]
+
+# Images displayed far smaller than their source get right-sized widths
+SITE_IMAGE_OVERRIDES = {
+    "logo.png": [40, 80, 120],  # 32px-high header logo at 1x-3x
+    "hero-img.png": [350],
+    "profile-img.png": [427],
+    "apple-touch-icon.png": [180],
+}
+
+# Modern formats, best first; AVIF only where Pillow can encode it
+SITE_IMAGE_FORMATS = {
+    "avif": ("AVIF", ".avif", {"quality": 60}),
+    "webp": ("WEBP", ".webp", {"quality": 82, "method": 6}),
+}
+
+# Fallback re-encoded from the source format
+SITE_FALLBACK_FORMATS = {
+    "png": ("PNG", ".png", {"optimize": True}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+FAVICON_SIZES = [16, 32, 48, 64]
+
+
+def avif_supported() -> bool:
+    return ".avif" in Image.registered_extensions()
+
+
+def optimize_site_image(src_path: str, out_dir: str, stem: str, widths=None) -> dict:
+    """
+    Build right-sized AVIF/WebP variants plus an optimized PNG (or JPEG)
+    fallback for one bundled site image. Transparency is kept except in
+    JPEG. Returns:
+        {"width", "height", "formats": {"avif": [{"width", "height",
+         "filename"}, ...], "webp": [...], "png": [...]}}
+    """
+    with Image.open(src_path) as source:
+        fallback = "png" if source.format == "PNG" else "jpeg"
+        source = ImageOps.exif_transpose(source)
+        has_alpha = source.mode in ("RGBA", "LA") or "transparency" in source.info
+        image = source.convert("RGBA" if has_alpha else "RGB")
+
+    targets = sorted({min(w, image.width) for w in (widths or SITE_IMAGE_WIDTHS)})
+    formats = dict(SITE_IMAGE_FORMATS)
+    if not avif_supported():
+        formats.pop("avif")
+    formats[fallback] = SITE_FALLBACK_FORMATS[fallback]
+
+    result = {"width": image.width, "height": image.height, "formats": {}}
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image
+        if width != image.width:
+            resized = image.resize((width, height), Image.LANCZOS)
+        for name, (fmt, ext, options) in formats.items():
+            out = _flatten(resized) if fmt == "JPEG" else resized
+            filename = f"{stem}-{width}{ext}"
+            out.save(os.path.join(out_dir, filename), fmt, **options)
+            result["formats"].setdefault(name, []).append(
+                {"width": width, "height": height, "filename": filename}
+            )
+    return result
+
+
+def build_favicon(src_path: str, dest_path: str, sizes=None) -> None:
+    """Write a multi-size favicon.ico, padding the source to a square."""
+    with Image.open(src_path) as source:
+        image = source.convert("RGBA")
+    side = max(image.size)
+    square = Image.new("RGBA", (side, side), (0, 0, 0, 0))
+    square.paste(image, ((side - image.width) // 2, (side - image.height) // 2))
+    sizes = sizes or FAVICON_SIZES
+    square.save(dest_path, "ICO", sizes=[(size, size) for size in sizes])
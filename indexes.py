@@ -0,0 +1,86 @@
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import PyMongoError
+import traceback
+
+from async_database import db, CONTACT_COLLECTION, ADMIN_COLLECTION, PROJECTS_COLLECTION
+from pagination import legacy_sort_filter
+from search import SEARCH_FIELDS, SEARCH_WEIGHTS
+
+
+# -----------------------------
+# Index Specification
+# -----------------------------
+# One entry per collection. Each index is (keys, options) and is passed
+# straight to IndexModel, so names must be stable for create_indexes to
+# stay idempotent across restarts.
+INDEX_SPECS = {
+    CONTACT_COLLECTION: [
+        (
+            [("created_at", DESCENDING), ("_id", DESCENDING)],
+            {"name": "created_at_id_desc"},
+        ),
+        (
+            [(field, TEXT) for field in SEARCH_FIELDS],
+            {"name": "message_text", "weights": SEARCH_WEIGHTS},
+        ),
+    ],
+    PROJECTS_COLLECTION: [
+        ([("created_at", DESCENDING)], {"name": "created_at_desc"}),
+        # Reference counting of content-addressed uploads
+        ([("image_sha256", ASCENDING)], {"name": "image_sha256"}),
+    ],
+    ADMIN_COLLECTION: [
+        ([("username", ASCENDING)], {"name": "username_unique", "unique": True}),
+    ],
+}
+
+
+# -----------------------------
+# Index Provisioning
+# -----------------------------
+async def ensure_indexes() -> None:
+    """
+    Create any index from INDEX_SPECS that does not exist yet.
+    Existing indexes are left untouched, so this is safe to run on every startup.
+    """
+    for collection_name, specs in INDEX_SPECS.items():
+        collection = db[collection_name]
+        try:
+            existing = await collection.index_information()
+            models = [IndexModel(keys, **options) for keys, options in specs]
+            missing = [m for m in models if m.document["name"] not in existing]
+
+            if not missing:
+                print(f"[INFO] Indexes on '{collection.name}' already up to date.")
+                continue
+
+            created = await collection.create_indexes(missing)
+            for name in created:
+                print(f"[INFO] Created index '{name}' on '{collection.name}'.")
+
+        except PyMongoError as e:
+            print(f"[ERROR] Index provisioning failed for '{collection.name}':", e)
+            traceback.print_exc()
+
+
+# -----------------------------
+# Sort Key Check
+# -----------------------------
+# Collections paged or listed by created_at
+DATE_SORTED_COLLECTIONS = [CONTACT_COLLECTION, PROJECTS_COLLECTION]
+
+
+async def check_sort_keys() -> None:
+    """Warn about documents keyset pagination cannot reach (one indexed count each)."""
+    for collection_name in DATE_SORTED_COLLECTIONS:
+        collection = db[collection_name]
+        try:
+            legacy = await collection.count_documents(legacy_sort_filter())
+        except PyMongoError as e:
+            print(f"[ERROR] Sort key check failed for '{collection.name}':", e)
+            continue
+        if legacy:
+            print(
+                f"[WARN] {legacy} document(s) in '{collection.name}' have a missing or "
+                "non-date created_at; run `python manage.py migrate-dates`."
+            )
@@ -0,0 +1,204 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+import asyncio
+import multiprocessing
+import os
+import posixpath
+import shutil
+import tempfile
+import traceback
+
+from async_database import projects_collection
+from images import process_image
+from media import find_processed_copy, ingest_upload, release_image, upload_key
+from storage import media_storage
+from uploads import StreamedUpload
+
+load_dotenv()
+
+# CPU-bound image work runs in worker processes, never on the event loop
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
+# Values of project["image_status"]. A job is claimed by moving its project
+# from pending to processing; image_claimed_at records when.
+IMAGE_PENDING = "pending"
+IMAGE_PROCESSING = "processing"
+IMAGE_READY = "ready"
+IMAGE_FAILED = "failed"
+
+# A claim older than this belonged to an app worker that died mid-job, so
+# the job may be claimed again
+IMAGE_JOB_TIMEOUT = timedelta(minutes=float(os.getenv("IMAGE_JOB_TIMEOUT_MINUTES", 15)))
+
+_pool = None
+_tasks = set()  # strong references so running jobs are not garbage collected
+
+
+# -----------------------------
+# Worker Pool
+# -----------------------------
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: a forked child would inherit the event loop, the Motor
+        # client's sockets and any locks held by other threads at fork time
+        _pool = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+# -----------------------------
+# Image Jobs
+# -----------------------------
+async def build_variants(key: str, stem: str) -> dict:
+    """
+    Fetch the original from storage, resize it in the process pool and
+    store each variant next to it. Returns the image_variants document.
+    """
+    loop = asyncio.get_running_loop()
+    shard = posixpath.dirname(key)
+    scratch = tempfile.mkdtemp(prefix=".variants-", dir=media_storage.scratch_dir)
+    try:
+        src_path = await run_in_threadpool(media_storage.fetch, key, scratch)
+        variants = await loop.run_in_executor(
+            get_pool(), process_image, src_path, scratch, stem
+        )
+        for items in variants.values():
+            for item in items:
+                variant_key = f"{shard}/{item.pop('filename')}"
+                await run_in_threadpool(
+                    media_storage.save_file,
+                    variant_key,
+                    os.path.join(scratch, posixpath.basename(variant_key)),
+                )
+                item["url"] = media_storage.url(variant_key)
+        return variants
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+async def store_received_image(upload_doc: dict) -> dict:
+    """
+    Store the temp file the upload route left for this job, without its
+    metadata. Returns the image fields for the project document.
+    """
+    upload = StreamedUpload.from_document(upload_doc)
+    try:
+        key = await run_in_threadpool(ingest_upload, upload, media_storage)
+    except Exception:
+        upload.discard()
+        raise
+    return {
+        "image_url": media_storage.url(key),
+        "image_sha256": upload.sha256,
+        "image_size": upload.size,
+    }
+
+
+async def run_image_job(project: dict, on_done):
+    """
+    Finish one project's image: store a freshly received upload (see
+    store_received_image), then build its variants, or reuse those of an
+    identical image, and record the outcome (ready/failed) on the project
+    document. on_done is awaited afterwards so caches pick up the new state.
+    """
+    project_id = project["_id"]
+    image = {}
+    variants = None
+    try:
+        if project.get("image_upload"):
+            image = await store_received_image(project["image_upload"])
+        key = upload_key(image.get("image_url") or project["image_url"])
+        stem = os.path.splitext(posixpath.basename(key))[0]
+        processed = await find_processed_copy(stem)
+        if processed:
+            variants = processed["image_variants"]
+        else:
+            variants = await build_variants(key, stem)
+        update = {
+            "$set": {**image, "image_status": IMAGE_READY, "image_variants": variants},
+            "$unset": {"image_error": "", "image_claimed_at": "", "image_upload": ""},
+        }
+    except Exception as e:
+        print(f"[ERROR] Image job failed for project {project_id}:", e)
+        traceback.print_exc()
+        update = {
+            "$set": {**image, "image_status": IMAGE_FAILED, "image_error": str(e)},
+            "$unset": {"image_claimed_at": "", "image_upload": ""},
+        }
+
+    try:
+        result = await projects_collection.update_one({"_id": project_id}, update)
+        if result.matched_count:
+            await on_done()
+        elif image or variants:
+            # The project was deleted while the job ran, so its release
+            # could not know about these files
+            orphan = {
+                "image_sha256": stem,
+                "image_url": media_storage.url(key),
+                "image_variants": variants,
+            }
+            await release_image(orphan, media_storage)
+    except Exception as e:
+        print(f"[ERROR] Could not record image job result for {project_id}:", e)
+        traceback.print_exc()
+
+
+def schedule_image_job(project: dict, on_done):
+    """
+    Start an image job in the background and return immediately. The
+    project must already be claimed (see claim_image_job).
+    """
+    task = asyncio.create_task(run_image_job(project, on_done))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+def claimed_job_fields() -> dict:
+    """Fields for a new project whose image job the inserting worker runs itself."""
+    return {"image_status": IMAGE_PROCESSING, "image_claimed_at": datetime.utcnow()}
+
+
+async def claim_image_job() -> dict | None:
+    """
+    Atomically take one pending job (or one whose claim timed out), so that
+    with several app workers each job is run by exactly one of them.
+    Returns the claimed project, or None when there is nothing to do.
+    """
+    now = datetime.utcnow()
+    return await projects_collection.find_one_and_update(
+        {
+            "$or": [
+                {"image_status": IMAGE_PENDING},
+                {
+                    "image_status": IMAGE_PROCESSING,
+                    "image_claimed_at": {"$lt": now - IMAGE_JOB_TIMEOUT},
+                },
+            ]
+        },
+        {"$set": {"image_status": IMAGE_PROCESSING, "image_claimed_at": now}},
+        projection={"image_url": 1, "image_upload": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def resume_pending_jobs(on_done) -> int:
+    """Claim and re-queue jobs left over by a restart. Returns how many were queued."""
+    count = 0
+    while (project := await claim_image_job()) is not None:
+        schedule_image_job(project, on_done)
+        count += 1
+    return count
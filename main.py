@@ -5,25 +5,65 @@ from fastapi import (
     Depends,
     HTTPException,
     status,
-    File,
-    UploadFile,
 )
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import ExecutionTimeout, PyMongoError
 from dotenv import load_dotenv
+import asyncio
 import os
 import traceback
-import shutil
-import uuid
 
 from schemas import ContactFormSchema
-from database import contact_collection, admin_collection, projects_collection
+from static_files import CachedStaticFiles
+from assets import asset_url, optimized_image
+from bundles import asset_bundle, preload_links
+from async_database import contact_collection, admin_collection, projects_collection
 from auth import hash_password, verify_password, create_access_token
 from deps import get_current_admin
+from project_cache import project_cache
+from page_cache import homepage_cache, project_fragment_cache, etag_matches
+from compression import choose_encodings, CompressionMiddleware, MIN_COMPRESS_BYTES
+from snapshot import (
+    read_snapshot,
+    snapshot_version,
+    write_snapshot,
+    SNAPSHOT_MODE,
+    SNAPSHOT_PATH,
+)
+from indexes import check_sort_keys, ensure_indexes
+from search import (
+    build_message_search,
+    normalize_search,
+    SEARCH_MODES,
+    SEARCH_MAX_LENGTH,
+    SEARCH_MAX_TIME_MS,
+    TEXT_MODE,
+)
+from counting import count_messages, invalidate_message_counts
+from pagination import (
+    build_page_pipeline,
+    clamp_page_size,
+    coerce_datetime,
+    decode_cursor,
+    encode_cursor,
+    DEFAULT_PAGE_SIZE,
+)
 from serializers import contact_list_serializer
+from uploads import receive_upload, UploadError
+from images import is_supported_image
+from media import release_image
+from storage import media_storage, LocalStorage, MEDIA_URL
+from upload_gc import run_upload_gc, UPLOAD_GC_INTERVAL_HOURS
+from jobs import (
+    claimed_job_fields,
+    resume_pending_jobs,
+    schedule_image_job,
+    shutdown_pool,
+)
 
 # -------------------------------------------------------------
 # Initialization
@@ -31,22 +71,37 @@ from serializers import contact_list_serializer
 load_dotenv()
 app = FastAPI(title="Portfolio Contact Admin Dashboard")
 
+# gzip/brotli for dynamic responses (cached pages bring their own)
+app.add_middleware(CompressionMiddleware)
+
 # Serve static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
 
 # Templates
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = asset_url
+templates.env.globals["optimized_image"] = optimized_image
+templates.env.globals["asset_bundle"] = asset_bundle
 
-# Upload directory
-UPLOAD_DIR = "static/uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Uploaded media goes through media_storage (local disk or S3, see
+# storage.py); local uploads live under the /static mount.
+
+
+# -------------------------------------------------------------
+# Provision Indexes on Startup
+# -------------------------------------------------------------
+@app.on_event("startup")
+async def provision_indexes():
+    """Create the MongoDB indexes the routes rely on."""
+    await ensure_indexes()
+    await check_sort_keys()
 
 
 # -------------------------------------------------------------
 # Create Default Admin on Startup
 # -------------------------------------------------------------
 @app.on_event("startup")
-def create_default_admin():
+async def create_default_admin():
     """Create the default admin if not existing."""
     admin_username = os.getenv("ADMIN_USERNAME")
     admin_password = os.getenv("ADMIN_PASSWORD")
@@ -55,10 +110,12 @@ def create_default_admin():
         print("ADMIN_USERNAME or ADMIN_PASSWORD not set in .env")
         return
 
-    existing_admin = admin_collection.find_one({"username": admin_username})
+    existing_admin = await admin_collection.find_one({"username": admin_username})
     if not existing_admin:
-        admin_collection.insert_one(
-            {"username": admin_username, "password": hash_password(admin_password)}
+        # bcrypt is deliberately slow; keep it off the event loop
+        hashed = await run_in_threadpool(hash_password, admin_password)
+        await admin_collection.insert_one(
+            {"username": admin_username, "password": hashed}
         )
         print(f"Default admin '{admin_username}' created.")
     else:
@@ -77,7 +134,7 @@ def create_default_admin():
 
 
 @app.post("/contact/form")
-def contact_form(
+async def contact_form(
     request: Request,
     name: str = Form(...),
     email: str = Form(...),
@@ -93,7 +150,8 @@ def contact_form(
             message=message,
             created_at=datetime.utcnow(),
         )
-        contact_collection.insert_one(data.dict())
+        await contact_collection.insert_one(data.dict())
+        invalidate_message_counts()
         return RedirectResponse(url="/?success=true", status_code=303)
 
     except Exception as e:
@@ -106,16 +164,20 @@ def contact_form(
 # Admin Login
 # -------------------------------------------------------------
 @app.get("/admin", response_class=HTMLResponse)
-def login_page(request: Request):
+async def login_page(request: Request):
     """Render the admin login page"""
     return templates.TemplateResponse("admin_login.html", {"request": request})
 
 
 @app.post("/admin/login")
-def admin_login(request: Request, username: str = Form(...), password: str = Form(...)):
+async def admin_login(
+    request: Request, username: str = Form(...), password: str = Form(...)
+):
     """Authenticate admin and set JWT cookie"""
-    admin = admin_collection.find_one({"username": username})
-    if admin and verify_password(password, admin["password"]):
+    admin = await admin_collection.find_one({"username": username})
+    # bcrypt takes tens of milliseconds; run it in the threadpool so other
+    # requests keep being served meanwhile
+    if admin and await run_in_threadpool(verify_password, password, admin["password"]):
         token = create_access_token({"sub": username})
         response = RedirectResponse(url="/admin/messages", status_code=303)
         response.set_cookie(key="access_token", value=token, httponly=True)
@@ -131,47 +193,72 @@ def admin_login(request: Request, username: str = Form(...), password: str = For
 # Admin Message Dashboard
 # -------------------------------------------------------------
 @app.get("/admin/messages", response_class=HTMLResponse)
-def admin_messages(
+async def admin_messages(
     request: Request,
     admin: str = Depends(get_current_admin),
     search: str = None,
-    page: int = 1,
-    limit: int = 10,
+    mode: str = TEXT_MODE,
+    advanced: bool = False,
+    after: str = None,
+    before: str = None,
+    limit: int = DEFAULT_PAGE_SIZE,
 ):
-    """Render admin message dashboard with pagination & search"""
+    """Render admin message dashboard with cursor pagination & search"""
     try:
-        query = {}
-        if search:
-            query = {
-                "$or": [
-                    {"name": {"$regex": search, "$options": "i"}},
-                    {"email": {"$regex": search, "$options": "i"}},
-                    {"subject": {"$regex": search, "$options": "i"}},
-                    {"message": {"$regex": search, "$options": "i"}},
-                ]
-            }
-
-        total_messages = contact_collection.count_documents(query)
-        total_pages = (total_messages + limit - 1) // limit
-
-        messages_cursor = (
-            contact_collection.find(query)
-            .sort("created_at", -1)
-            .skip((page - 1) * limit)
-            .limit(limit)
-        )
+        if mode not in SEARCH_MODES:
+            mode = TEXT_MODE
+        limit = clamp_page_size(limit)
+        search = normalize_search(search)
+        query, sort = build_message_search(search, mode, advanced)
+
+        # Searches are bounded server-side; a timeout degrades to partial results
+        timed_out = False
+        try:
+            total_messages = await count_messages(contact_collection, query)
+        except ExecutionTimeout:
+            timed_out = True
+            total_messages = None
+
+        # Keyset pagination: seek past the (sort keys..., _id) of the cursor
+        # document instead of skipping, so every page costs the same.
+        backwards = bool(before) and not after
+        values = decode_cursor(before if backwards else after, sort)
+        if values is None:
+            backwards = False
+        pipeline = build_page_pipeline(query, sort, values, backwards, limit)
+
+        docs = []
+        try:
+            async for doc in contact_collection.aggregate(
+                pipeline, maxTimeMS=SEARCH_MAX_TIME_MS
+            ):
+                docs.append(doc)
+        except ExecutionTimeout:
+            print(f"[WARN] /admin/messages search timed out: {search!r}")
+            timed_out = True
+
+        has_more = len(docs) > limit
+        docs = docs[:limit]
+        if backwards:
+            docs.reverse()
+            has_prev, has_next = has_more, True
+        else:
+            has_prev, has_next = values is not None, has_more
+
+        base_url = request.url.remove_query_params(["after", "before"])
+        prev_url = next_url = None
+        prev_token = encode_cursor(docs[0], sort) if docs and has_prev else None
+        next_token = encode_cursor(docs[-1], sort) if docs and has_next else None
+        if prev_token:
+            prev_url = str(base_url.include_query_params(before=prev_token))
+        if next_token:
+            next_url = str(base_url.include_query_params(after=next_token))
 
         messages = []
-        for msg in messages_cursor:
+        for msg in docs:
+            # Unmigrated documents (see manage.py migrate-dates) still display
+            msg["created_at"] = coerce_datetime(msg.get("created_at"), msg["_id"])
             msg["_id"] = str(msg["_id"])
-            created_at = msg.get("created_at")
-            if isinstance(created_at, str):
-                try:
-                    msg["created_at"] = datetime.fromisoformat(created_at)
-                except Exception:
-                    msg["created_at"] = datetime.utcnow()
-            elif not isinstance(created_at, datetime):
-                msg["created_at"] = datetime.utcnow()
             messages.append(msg)
 
         return templates.TemplateResponse(
@@ -179,9 +266,15 @@ def admin_messages(
             {
                 "request": request,
                 "messages": contact_list_serializer(messages),
-                "page": page,
-                "total_pages": total_pages,
-                "search": search or "",
+                "total_messages": total_messages,
+                "prev_url": prev_url,
+                "next_url": next_url,
+                "first_url": str(base_url) if has_prev else None,
+                "search": search,
+                "mode": mode,
+                "advanced": advanced,
+                "max_search_length": SEARCH_MAX_LENGTH,
+                "timed_out": timed_out,
             },
         )
 
@@ -195,12 +288,13 @@ def admin_messages(
 # Delete Message
 # -------------------------------------------------------------
 @app.post("/admin/delete/{message_id}")
-def delete_message(message_id: str, admin: str = Depends(get_current_admin)):
+async def delete_message(message_id: str, admin: str = Depends(get_current_admin)):
     """Delete message by ID"""
     try:
-        result = contact_collection.delete_one({"_id": ObjectId(message_id)})
+        result = await contact_collection.delete_one({"_id": ObjectId(message_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Message not found")
+        invalidate_message_counts()
 
         return RedirectResponse(url="/admin/messages", status_code=303)
 
@@ -214,13 +308,120 @@ def delete_message(message_id: str, admin: str = Depends(get_current_admin)):
 # Logout
 # -------------------------------------------------------------
 @app.get("/admin/logout")
-def admin_logout():
+async def admin_logout():
     """Logout admin by clearing cookie"""
     response = RedirectResponse(url="/admin", status_code=303)
     response.delete_cookie("access_token")
     return response
 
 
+# -------------------------------------------------------------
+# Homepage Rendering & Snapshot
+# -------------------------------------------------------------
+# Contact-form error codes the homepage understands (?error=<code>). The
+# alert shows one of these fixed messages, never the query value itself.
+CONTACT_ERRORS = {
+    "true": "Your message could not be sent. Please try again later.",
+}
+
+
+def contact_flags(success: str | None, error: str | None) -> tuple:
+    """
+    Reduce the ?success/?error query values to (bool, known error code or
+    None), so the homepage cache holds at most a handful of variants.
+    """
+    if error and error not in CONTACT_ERRORS:
+        error = "true"
+    return bool(success), error or None
+
+
+async def render_homepage(success: bool = False, error: str = None) -> bytes:
+    """Render index.html with the current project list."""
+    # Served from memory between project mutations (see project_cache.py)
+    projects = await project_cache.get_projects()
+    html = templates.get_template("index.html").render(
+        {
+            "success": success,
+            "error": CONTACT_ERRORS.get(error),
+            "projects": projects,
+        }
+    )
+    return html.encode("utf-8")
+
+
+async def refresh_snapshot():
+    """Re-render the homepage and atomically replace the snapshot file."""
+    body = await render_homepage()
+    await run_in_threadpool(write_snapshot, body)
+    print(f"[INFO] Homepage snapshot written to {SNAPSHOT_PATH}.")
+
+
+async def projects_changed():
+    """Invalidate everything derived from the project list after a mutation."""
+    await project_cache.bump()
+    # Pages rendered from the old list are unreachable under the new
+    # version anyway; dropping them also covers a failed bump
+    homepage_cache.clear()
+    project_fragment_cache.clear()
+    if SNAPSHOT_MODE:
+        try:
+            await refresh_snapshot()
+        except Exception as e:
+            print("[ERROR] Failed to refresh homepage snapshot:", e)
+            traceback.print_exc()
+
+
+@app.on_event("startup")
+async def ensure_snapshot():
+    """
+    In snapshot mode, re-render the snapshot on every start, since a deploy
+    may have changed the templates, critical CSS or asset manifest. If the
+    database is unreachable the previous snapshot keeps being served.
+    """
+    if SNAPSHOT_MODE:
+        try:
+            await refresh_snapshot()
+        except Exception as e:
+            print("[WARN] Could not refresh the homepage snapshot on startup:", e)
+
+
+# -------------------------------------------------------------
+# Image Jobs on Startup / Shutdown
+# -------------------------------------------------------------
+@app.on_event("startup")
+async def resume_image_jobs():
+    """Re-queue image jobs that were still pending when the app stopped."""
+    count = await resume_pending_jobs(projects_changed)
+    if count:
+        print(f"[INFO] Resumed {count} pending image job(s).")
+
+
+@app.on_event("shutdown")
+def stop_image_workers():
+    shutdown_pool()
+
+
+# -------------------------------------------------------------
+# Scheduled Upload GC
+# -------------------------------------------------------------
+@app.on_event("startup")
+async def start_upload_gc():
+    """Periodically reclaim orphaned uploads if UPLOAD_GC_INTERVAL_HOURS is set."""
+    app.state.upload_gc = None
+    if UPLOAD_GC_INTERVAL_HOURS > 0 and isinstance(media_storage, LocalStorage):
+        app.state.upload_gc = asyncio.create_task(
+            run_upload_gc(
+                projects_collection, media_storage.root, UPLOAD_GC_INTERVAL_HOURS
+            )
+        )
+
+
+@app.on_event("shutdown")
+def stop_upload_gc():
+    if app.state.upload_gc is not None:
+        app.state.upload_gc.cancel()
+
+
 # -------------------------------------------------------------
 # PROJECTS
 # -------------------------------------------------------------
@@ -238,46 +439,59 @@ async def admin_upload_page(request: Request):
 # Upload Project (POST)
 # -------------------------------------------------------------
 @app.post("/admin/upload-project")
-async def upload_project(
-    request: Request,
-    title: str = Form(...),
-    description: str = Form(...),
-    category: str = Form(...),
-    link: str = Form(None),
-    image: UploadFile = File(...),
-):
-
-    # Allowed formats
-    allowed_types = ["image/png", "image/jpeg", "image/jpg", "image/webp"]
-    if image.content_type not in allowed_types:
+async def upload_project(request: Request):
+    # The multipart body is parsed here rather than through Form()/File()
+    # so the image streams to disk (size-capped and hashed) instead of
+    # being spooled by Starlette first.
+    try:
+        fields, image = await receive_upload(
+            request, "image", media_storage.scratch_dir
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    if image is None:
+        raise HTTPException(status_code=400, detail="An image file is required.")
+
+    title = fields.get("title")
+    description = fields.get("description")
+    category = fields.get("category")
+    link = fields.get("link")
+    if not title or not description or not category:
+        image.discard()
         raise HTTPException(
-            status_code=400,
-            detail="Unsupported file type. Use PNG, JPG, JPEG, or WEBP."
+            status_code=400, detail="Title, description and category are required."
         )
 
-    # Generate unique filename
-    ext = image.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
-
-    # Save image to /static/uploads/
-    save_path = f"static/uploads/{filename}"
-
-    with open(save_path, "wb") as buffer:
-        shutil.copyfileobj(image.file, buffer)
-
-    # Image URL for frontend (correct path!)
-    image_url = f"/static/uploads/{filename}"
+    # Only the header is checked here. Stripping EXIF (GPS coordinates and
+    # the like), hashing and storing happen in the image job, so the
+    # request costs no more than writing the file; until the job is done
+    # the project has no public image.
+    if not await run_in_threadpool(is_supported_image, image.tmp_path):
+        image.discard()
+        raise HTTPException(status_code=400, detail="The image file could not be read.")
 
     project = {
         "title": title,
         "description": description,
         "category": category,
-        "image_url": image_url,
+        "image_upload": image.to_document(),
         "link": link if link else "#",
         "created_at": datetime.utcnow(),
+        # Claimed by this worker, so no other worker's resume picks it up
+        **claimed_job_fields(),
     }
+    try:
+        await projects_collection.insert_one(project)
+    except Exception:
+        image.discard()
+        raise
 
-    projects_collection.insert_one(project)
+    # The original is stored under its content digest (identical images
+    # share one file and its variants), and resized WebP/JPEG variants are
+    # built in the worker pool; the project joins the homepage once the
+    # job has stored its image.
+    schedule_image_job(project, projects_changed)
 
     return RedirectResponse("/admin/projects", status_code=302)
 
@@ -287,7 +501,7 @@ async def upload_project(
 # -----------------------------
 @app.get("/admin/projects", response_class=HTMLResponse)
 async def view_projects(request: Request):
-    projects = list(projects_collection.find().sort("created_at", -1))
+    projects = await projects_collection.find().sort("created_at", -1).to_list(None)
 
     for p in projects:
         p["_id"] = str(p["_id"])
@@ -310,7 +524,7 @@ async def upload_project_form(request: Request):
 # -----------------------------
 @app.get("/admin/edit/{project_id}", response_class=HTMLResponse)
 async def edit_project_form(request: Request, project_id: str):
-    project = projects_collection.find_one({"_id": ObjectId(project_id)})
+    project = await projects_collection.find_one({"_id": ObjectId(project_id)})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     project["_id"] = str(project["_id"])
@@ -327,11 +541,12 @@ async def edit_project(
     link: str = Form(None),
 ):
     update = {"title": title, "description": description, "link": link or "#"}
-    result = projects_collection.update_one(
+    result = await projects_collection.update_one(
         {"_id": ObjectId(project_id)}, {"$set": update}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
+    await projects_changed()
     return RedirectResponse("/admin/projects", status_code=302)
 
 
@@ -340,12 +555,41 @@ async def edit_project(
 # -----------------------------
 @app.get("/admin/delete/{project_id}")
 async def delete_project(project_id: str):
-    result = projects_collection.delete_one({"_id": ObjectId(project_id)})
-    if result.deleted_count == 0:
+    project = await projects_collection.find_one_and_delete(
+        {"_id": ObjectId(project_id)}
+    )
+    if project is None:
         raise HTTPException(status_code=404, detail="Project not found")
+    await projects_changed()
+
+    # Files go once the last project sharing this image is deleted
+    await release_image(project, media_storage)
     return RedirectResponse("/admin/projects", status_code=302)
 
 
+# -----------------------------
+# Admin: Project Cache Stats
+# -----------------------------
+@app.get("/admin/cache-stats")
+async def cache_stats(admin: str = Depends(get_current_admin)):
+    """Expose hit/miss counters of the homepage project cache"""
+    return JSONResponse({"projects": project_cache.stats()})
+
+
+# -----------------------------
+# Media Redirect (private buckets)
+# -----------------------------
+@app.get(MEDIA_URL + "/{key:path}")
+async def media_redirect(key: str):
+    """Send the browser to a presigned storage URL; bytes never pass through here."""
+    target = await run_in_threadpool(media_storage.signed_url, key)
+    # Cache the redirect well inside the presigned URL's lifetime
+    max_age = getattr(media_storage, "url_expiry", 3600) // 2
+    return RedirectResponse(
+        target, status_code=307, headers={"Cache-Control": f"private, max-age={max_age}"}
+    )
+
+
 # -------------------------------------------------------------
 # Portfolio (Frontend)
 # -------------------------------------------------------------
@@ -381,34 +625,97 @@ async def delete_project(project_id: str):
 async def index(request: Request, success: str = None, error: str = None):
     """Homepage (contact form & portfolio projects)"""
 
-    # Fetch projects from MongoDB (sorted newest first)
-    projects_cursor = projects_collection.find().sort("created_at", -1)
-    projects = []
-
-    for project in projects_cursor:
-        project["_id"] = str(project["_id"])  # Convert ObjectId -> string
-
-        # Ensure missing fields do not break the HTML
-        project.setdefault("title", "Untitled Project")
-
-        # NOTE: Your admin_upload.html uses a 'category' field,
-        # but your upload logic doesn't save it and your index.html uses no category filter.
-        # For now, we'll default to 'General' to prevent an error if you add filtering later.
-        project.setdefault("category", "General")
-
-        project.setdefault(
-            "image_url", "/static/default.jpg"
-        )  # Assuming you have a default image
-        project.setdefault("description", "")
-
-        projects.append(project)
-
-    return templates.TemplateResponse(
-        "index.html",
-        {
-            "request": request,
-            "success": success,
-            "error": error,
-            "projects": projects,  # <-- This is the crucial context variable
-        },
-    )
+    # Snapshot mode: the plain homepage is a file read plus a stat() check
+    if SNAPSHOT_MODE and not success and not error:
+        page = await load_snapshot_page()
+        if page is not None:
+            return await page_response(request, page)
+
+    # The page only varies by the project list and the two contact-form
+    # flags, so the rendered bytes are cached per (version, success, error).
+    # The flags are normalized first: raw query values would let anyone
+    # fill the cache with (and echo back) arbitrary strings.
+    success, error = contact_flags(success, error)
+    key = (await project_cache.current_version(), success, error)
+    page = homepage_cache.get(key)
+
+    if page is None:
+        try:
+            body = await render_homepage(success, error)
+        except PyMongoError as e:
+            # MongoDB is unavailable: keep the site up from the last snapshot
+            print("[ERROR] Homepage render failed, falling back to snapshot:", e)
+            page = await load_snapshot_page()
+            if page is None:
+                raise
+            return await page_response(request, page)
+        page = homepage_cache.put(key, body)
+
+    return await page_response(request, page)
+
+
+@app.get("/projects/{project_id}/detail", response_class=HTMLResponse)
+async def project_detail(request: Request, project_id: str):
+    """
+    HTML fragment filling the homepage's single project modal, so the page
+    no longer renders a modal (and a second image) per project.
+    """
+    key = (await project_cache.current_version(), project_id)
+    page = project_fragment_cache.get(key)
+    if page is None:
+        project = await project_cache.get_project(project_id)
+        if project is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+        html = templates.get_template("_project_detail.html").render({"project": project})
+        page = project_fragment_cache.put(key, html.encode("utf-8"))
+    return await page_response(request, page, preload=False)
+
+
+async def load_snapshot_page():
+    """Return the snapshot as a CachedPage, re-reading it only when it changed."""
+    version = snapshot_version()
+    if version is None:
+        return None
+    key = ("snapshot", version)
+    page = homepage_cache.get(key)
+    if page is None:
+        body = await run_in_threadpool(read_snapshot)
+        if body is None:
+            return None
+        page = homepage_cache.put(key, body)
+    return page
+
+
+# Above-the-fold images preloaded with the homepage ({path: sizes})
+HOMEPAGE_PRELOAD_IMAGES = {"img/hero-img.png": "100vw"}
+
+
+async def page_response(request: Request, page, preload: bool = True):
+    """
+    Send a cached page, answering conditional requests with 304. The
+    compressed body is cached on the page, so it is compressed once per
+    encoding rather than once per request. preload adds the homepage's
+    Link preload header.
+    """
+    headers = {
+        "ETag": page.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    links = preload_links(HOMEPAGE_PRELOAD_IMAGES) if preload else None
+    if links:
+        headers["Link"] = links
+    encodings = choose_encodings(request.headers.get("accept-encoding"))
+    body = page.body
+    if encodings and len(body) >= MIN_COMPRESS_BYTES:
+        encoding = encodings[0]
+        if encoding not in page.encoded:
+            await run_in_threadpool(page.encode, encoding)
+        body = page.encoded[encoding]
+        headers["Content-Encoding"] = encoding
+        headers["ETag"] = page.encoded_etag(encoding)
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
@@ -0,0 +1,423 @@
+"""
+Maintenance commands for the portfolio app.
+
+Usage:
+    python manage.py snapshot          Re-render the static homepage snapshot
+    python manage.py verify-uploads    Re-hash stored uploads against MongoDB
+    python manage.py gc-uploads        Reclaim uploads no project references
+    python manage.py migrate-uploads   Move flat uploads into shard directories
+    python manage.py migrate-dates     Store every created_at as a BSON date
+    python manage.py optimize-images   Build AVIF/WebP/PNG variants and favicon.ico
+    python manage.py build-assets      Subset, purge, bundle and fingerprint assets
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from upload_gc import UPLOAD_GC_GRACE_HOURS, UPLOAD_GC_MODE, UPLOAD_GC_MODES
+
+
+# -----------------------------
+# Commands
+# -----------------------------
+def _require_local_storage(command: str):
+    from storage import STORAGE_BACKEND
+
+    if STORAGE_BACKEND != "local":
+        print(f"[ERROR] {command} only works with STORAGE_BACKEND=local.")
+        sys.exit(2)
+
+
+def _bump_project_version():
+    """Make running app workers reload the project list (see project_cache.py)."""
+    from database import cache_version_collection
+    from project_cache import PROJECTS_VERSION_ID
+
+    cache_version_collection.update_one(
+        {"_id": PROJECTS_VERSION_ID}, {"$inc": {"version": 1}}, upsert=True
+    )
+
+
+def cmd_snapshot(args):
+    """Regenerate the homepage snapshot from the current project list."""
+    from main import refresh_snapshot
+
+    asyncio.run(refresh_snapshot())
+
+
+def cmd_verify_uploads(args):
+    """Check every project's image file still matches its recorded SHA-256."""
+    from database import projects_collection
+    from storage import UPLOAD_DIR
+    from media import file_sha256, locate_upload
+
+    _require_local_storage("verify-uploads")
+
+    checked = missing = corrupt = 0
+    seen = set()
+    for project in projects_collection.find({"image_sha256": {"$exists": True}}):
+        filename = project["image_url"].rsplit("/", 1)[-1]
+        if filename in seen:
+            continue
+        seen.add(filename)
+
+        path = locate_upload(UPLOAD_DIR, filename)
+        checked += 1
+        if not os.path.exists(path):
+            missing += 1
+            print(f"[ERROR] Missing: {path} (project {project['_id']})")
+        elif file_sha256(path) != project["image_sha256"]:
+            corrupt += 1
+            print(f"[ERROR] Checksum mismatch: {path} (project {project['_id']})")
+
+    print(f"[INFO] Checked {checked} file(s): {missing} missing, {corrupt} corrupt.")
+    if missing or corrupt:
+        sys.exit(1)
+
+
+def cmd_gc_uploads(args):
+    """Quarantine or delete upload files that no project references."""
+    from database import projects_collection
+    from storage import UPLOAD_DIR
+    from upload_gc import (
+        find_orphans,
+        format_bytes,
+        reclaim,
+        referenced_files,
+        REFERENCE_PROJECTION,
+    )
+
+    _require_local_storage("gc-uploads")
+
+    projects = projects_collection.find({}, REFERENCE_PROJECTION)
+    filenames, digests = referenced_files(projects)
+    orphans = find_orphans(UPLOAD_DIR, filenames, digests, args.grace_hours * 3600)
+    total = sum(size for _, size in orphans)
+
+    if args.dry_run:
+        for path, size in orphans:
+            print(f"[INFO] Orphan: {path} ({format_bytes(size)})")
+        print(f"[INFO] {len(orphans)} orphan(s), {format_bytes(total)} reclaimable.")
+        return
+
+    files, reclaimed = reclaim(orphans, args.mode)
+    print(f"[INFO] {args.mode}: {files} orphan(s), {format_bytes(reclaimed)} reclaimed.")
+
+
+def cmd_migrate_uploads(args):
+    """
+    Move flat uploads into the ab/cd/ shard layout, then rewrite the stored
+    URLs. Files move first: until a running app reloads its projects, the
+    old flat URLs are still resolved to the sharded files by the static
+    file handler.
+    """
+    from pymongo import UpdateOne
+    from database import projects_collection
+    from storage import UPLOAD_DIR, UPLOAD_URL
+    from media import shard_path, sharded_url
+    from snapshot import SNAPSHOT_MODE
+
+    _require_local_storage("migrate-uploads")
+
+    with os.scandir(UPLOAD_DIR) as entries:
+        flat = [
+            entry
+            for entry in entries
+            if entry.is_file(follow_symlinks=False)
+            and not entry.name.startswith(".upload-")
+        ]
+
+    for entry in flat:
+        dest = os.path.join(UPLOAD_DIR, *shard_path(entry.name).split("/"))
+        if args.dry_run:
+            print(f"[INFO] Would move {entry.path} -> {dest}")
+            continue
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        os.replace(entry.path, dest)
+
+    operations = []
+    updated = 0
+    for project in projects_collection.find({}, {"image_url": 1, "image_variants": 1}):
+        update = {}
+        image_url = sharded_url(project.get("image_url"), UPLOAD_URL)
+        if image_url != project.get("image_url"):
+            update["image_url"] = image_url
+
+        variants = project.get("image_variants")
+        if variants:
+            rewritten = {
+                fmt: [{**v, "url": sharded_url(v["url"], UPLOAD_URL)} for v in items]
+                for fmt, items in variants.items()
+            }
+            if rewritten != variants:
+                update["image_variants"] = rewritten
+
+        if update:
+            operations.append(UpdateOne({"_id": project["_id"]}, {"$set": update}))
+        if len(operations) >= args.batch_size:
+            updated += _flush_writes(projects_collection, operations, args.dry_run)
+    updated += _flush_writes(projects_collection, operations, args.dry_run)
+
+    verb = "Would move" if args.dry_run else "Moved"
+    print(f"[INFO] {verb} {len(flat)} file(s), {updated} project(s) to update.")
+    if updated and not args.dry_run:
+        _bump_project_version()
+        if SNAPSHOT_MODE:
+            cmd_snapshot(args)  # the snapshot still holds the flat URLs
+
+
+def cmd_migrate_dates(args):
+    """
+    Rewrite string or missing created_at values as BSON dates, so keyset
+    pagination (which compares within one BSON type) reaches them. ISO
+    strings are parsed; anything else takes the document's ObjectId time.
+    """
+    from pymongo import UpdateOne
+    from database import db, PROJECTS_COLLECTION
+    from indexes import DATE_SORTED_COLLECTIONS
+    from pagination import coerce_datetime, legacy_sort_filter
+
+    for collection_name in DATE_SORTED_COLLECTIONS:
+        collection = db[collection_name]
+        operations = []
+        updated = skipped = 0
+        for doc in collection.find(legacy_sort_filter(), {"created_at": 1}):
+            created_at = coerce_datetime(doc.get("created_at"), doc["_id"])
+            if created_at is None:
+                skipped += 1
+                print(f"[WARN] No date for {collection_name} {doc['_id']!r}; left as is.")
+                continue
+            operations.append(
+                UpdateOne({"_id": doc["_id"]}, {"$set": {"created_at": created_at}})
+            )
+            if len(operations) >= args.batch_size:
+                updated += _flush_writes(collection, operations, args.dry_run)
+        updated += _flush_writes(collection, operations, args.dry_run)
+
+        verb = "Would update" if args.dry_run else "Updated"
+        print(f"[INFO] {verb} {updated} document(s) in '{collection_name}', skipped {skipped}.")
+        if updated and not args.dry_run and collection_name == PROJECTS_COLLECTION:
+            _bump_project_version()  # the homepage lists projects newest first
+
+
+def _flush_writes(collection, operations, dry_run) -> int:
+    """Send one unordered bulk write and clear the batch. Returns its size."""
+    count = len(operations)
+    if operations and not dry_run:
+        collection.bulk_write(operations, ordered=False)
+    operations.clear()
+    return count
+
+
+def cmd_optimize_images(args):
+    """Right-size and re-encode the bundled images in static/assets/img."""
+    from assets import write_json, ASSETS_DIR, IMAGE_INDEX_PATH, OPTIMIZED_IMAGE_DIR
+    from images import (
+        build_favicon,
+        optimize_site_image,
+        SITE_IMAGE_OVERRIDES,
+    )
+    from upload_gc import format_bytes
+
+    src_dir = os.path.join(ASSETS_DIR, "img")
+    out_dir = os.path.join(ASSETS_DIR, OPTIMIZED_IMAGE_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with os.scandir(src_dir) as entries:
+        sources = sorted(
+            (entry for entry in entries if entry.is_file()), key=lambda e: e.name
+        )
+
+    index, stems = {}, set()
+    before = after = 0
+    for entry in sources:
+        stem, ext = os.path.splitext(entry.name)
+        if ext.lower() not in (".png", ".jpg", ".jpeg"):
+            continue
+        if stem in stems:  # hero-img.png and hero-img.jpeg
+            stem = f"{stem}-{ext[1:].lower()}"
+        stems.add(stem)
+
+        info = optimize_site_image(
+            entry.path, out_dir, stem, SITE_IMAGE_OVERRIDES.get(entry.name)
+        )
+        fallback = "png" if "png" in info["formats"] else "jpeg"
+        widest = info["formats"][fallback][-1]
+        index[f"img/{entry.name}"] = {
+            "width": widest["width"],
+            "height": widest["height"],
+            "fallback": fallback,
+            "sources": {
+                name: [
+                    {
+                        "width": v["width"],
+                        "height": v["height"],
+                        "path": f"{OPTIMIZED_IMAGE_DIR}/{v['filename']}",
+                    }
+                    for v in variants
+                ]
+                for name, variants in info["formats"].items()
+            },
+        }
+
+        # Compare the original with the best format at the widest size
+        size, best = min(
+            (os.path.getsize(os.path.join(out_dir, variants[-1]["filename"])), name)
+            for name, variants in info["formats"].items()
+        )
+        before += entry.stat().st_size
+        after += size
+        print(
+            f"[INFO] {entry.name}: {format_bytes(entry.stat().st_size)} -> "
+            f"{format_bytes(size)} ({best}, {widest['width']}px)"
+        )
+
+    favicon_src = os.path.join(src_dir, "favicon.png")
+    if os.path.exists(favicon_src) and "img/favicon.png" in index:
+        build_favicon(favicon_src, os.path.join(out_dir, "favicon.ico"))
+        index["img/favicon.png"]["ico"] = f"{OPTIMIZED_IMAGE_DIR}/favicon.ico"
+
+    write_json(index, IMAGE_INDEX_PATH)
+    print(f"[INFO] {len(index)} image(s): {format_bytes(before)} -> {format_bytes(after)}.")
+
+
+def cmd_build_assets(args):
+    """
+    Subset the icon font, purge unused CSS, bundle and minify the site
+    CSS/JS, extract the homepage's critical CSS, precompress static/assets,
+    then hash everything and write the manifest.
+    """
+    from bundles import build_bundles, build_critical_css, CRITICAL_CSS_PATH
+    from icon_font import subset_icon_font, subset_stylesheet, ICON_STYLESHEET
+    from purge import purge_stylesheets
+    from assets import (
+        build_manifest,
+        precompress_assets,
+        write_manifest,
+        ASSET_MANIFEST_PATH,
+        ASSETS_DIR,
+    )
+    from upload_gc import format_bytes
+
+    replaced = {}
+    try:
+        for relpath, (original, trimmed) in subset_icon_font().items():
+            print(f"[INFO] {relpath}: {format_bytes(original)} -> {format_bytes(trimmed)}.")
+        replaced[ICON_STYLESHEET] = subset_stylesheet()
+    except RuntimeError as e:
+        print("[WARN] Icon font not subset:", e)
+
+    if not args.no_purge:
+        purged = purge_stylesheets(replaced=replaced)
+        for relpath, css in purged.items():
+            before = os.path.getsize(os.path.join(ASSETS_DIR, *relpath.split("/")))
+            after = len(css.encode())
+            print(
+                f"[INFO] Purged {relpath}: {format_bytes(before)} -> "
+                f"{format_bytes(after)} ({format_bytes(before - after)} saved)."
+            )
+        replaced.update(purged)
+
+    for name, (original, bundled) in build_bundles(replaced=replaced).items():
+        print(f"[INFO] {name}: {format_bytes(original)} -> {format_bytes(bundled)}.")
+
+    bundled, critical = build_critical_css()
+    print(
+        f"[INFO] Critical CSS: {format_bytes(critical)} of {format_bytes(bundled)} "
+        f"inlined, written to {CRITICAL_CSS_PATH}."
+    )
+
+    for encoding, (files, original, compressed) in precompress_assets().items():
+        print(
+            f"[INFO] {encoding}: {files} file(s), "
+            f"{format_bytes(original)} -> {format_bytes(compressed)}."
+        )
+
+    manifest = build_manifest()
+    write_manifest(manifest)
+    print(f"[INFO] Wrote {len(manifest)} asset(s) to {ASSET_MANIFEST_PATH}.")
+
+
+# -----------------------------
+# CLI
+# -----------------------------
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Portfolio maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    snapshot = subparsers.add_parser(
+        "snapshot", help="re-render the static homepage snapshot"
+    )
+    snapshot.set_defaults(func=cmd_snapshot)
+
+    verify = subparsers.add_parser(
+        "verify-uploads", help="re-hash stored uploads and report corruption"
+    )
+    verify.set_defaults(func=cmd_verify_uploads)
+
+    gc = subparsers.add_parser(
+        "gc-uploads", help="reclaim upload files no project references"
+    )
+    gc.add_argument(
+        "--mode",
+        choices=UPLOAD_GC_MODES,
+        default=UPLOAD_GC_MODE,
+        help="move orphans to the quarantine directory or delete them",
+    )
+    gc.add_argument(
+        "--grace-hours",
+        type=float,
+        default=UPLOAD_GC_GRACE_HOURS,
+        help="skip files modified more recently than this",
+    )
+    gc.add_argument(
+        "--dry-run", action="store_true", help="only list what would be reclaimed"
+    )
+    gc.set_defaults(func=cmd_gc_uploads)
+
+    migrate = subparsers.add_parser(
+        "migrate-uploads", help="move flat uploads into shard directories"
+    )
+    migrate.add_argument(
+        "--batch-size", type=int, default=500, help="updates per bulk write"
+    )
+    migrate.add_argument(
+        "--dry-run", action="store_true", help="only report what would change"
+    )
+    migrate.set_defaults(func=cmd_migrate_uploads)
+
+    dates = subparsers.add_parser(
+        "migrate-dates", help="store every created_at as a BSON date"
+    )
+    dates.add_argument(
+        "--batch-size", type=int, default=500, help="updates per bulk write"
+    )
+    dates.add_argument(
+        "--dry-run", action="store_true", help="only report what would change"
+    )
+    dates.set_defaults(func=cmd_migrate_dates)
+
+    optimize = subparsers.add_parser(
+        "optimize-images", help="build AVIF/WebP/PNG variants and favicon.ico"
+    )
+    optimize.set_defaults(func=cmd_optimize_images)
+
+    build = subparsers.add_parser(
+        "build-assets", help="bundle, precompress and fingerprint assets"
+    )
+    build.add_argument(
+        "--no-purge", action="store_true", help="bundle stylesheets without purging"
+    )
+    build.set_defaults(func=cmd_build_assets)
+
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
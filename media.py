@@ -0,0 +1,200 @@
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+import asyncio
+import hashlib
+import os
+import re
+import time
+import traceback
+
+from async_database import projects_collection
+from images import strip_metadata
+
+load_dotenv()
+
+# Canonical extension per accepted content type; the client-supplied
+# filename is never used to build storage paths.
+CONTENT_TYPE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/webp": "webp",
+}
+
+# <sha256>.<ext> originals and <sha256>-<width>.<ext> variants
+CONTENT_ADDRESSED_RE = re.compile(r"^[0-9a-f]{64}(?:-\d+)?\.[a-z0-9]+$")
+
+# Uploads fan out into <upload_dir>/ab/cd/<name> so no directory grows
+# past a few hundred entries even with a large media library.
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+# An upload that reuses stored content touches it before its project
+# document exists; a concurrent delete of the last other reference must
+# not remove the file in that window. Files stored or reused this
+# recently are released again once the grace period is over.
+RELEASE_GRACE_SECONDS = float(os.getenv("UPLOAD_RELEASE_GRACE_MINUTES", 10)) * 60
+
+_release_tasks = set()  # strong references to deferred releases
+
+
+# -----------------------------
+# Content-addressed Names
+# -----------------------------
+def content_filename(digest: str, content_type: str) -> str:
+    return f"{digest}.{CONTENT_TYPE_EXTENSIONS[content_type]}"
+
+
+def is_content_addressed(filename: str) -> bool:
+    return bool(CONTENT_ADDRESSED_RE.match(filename))
+
+
+def shard_path(filename: str) -> str:
+    """
+    Sharded location of an upload relative to the upload dir, e.g.
+    'ab/cd/<filename>'. Content-addressed files shard on their digest so
+    variants sit next to their original; other names shard on a hash of
+    the name.
+    """
+    if is_content_addressed(filename):
+        key = filename[:64]
+    else:
+        key = hashlib.sha256(filename.encode("utf-8")).hexdigest()
+    parts = [key[i * SHARD_WIDTH : (i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return "/".join(parts + [filename])
+
+
+def locate_upload(upload_dir: str, filename: str) -> str:
+    """
+    Filesystem path of an upload. Prefers the sharded location and falls
+    back to a legacy flat file that has not been migrated yet.
+    """
+    sharded = os.path.join(upload_dir, *shard_path(filename).split("/"))
+    if os.path.exists(sharded):
+        return sharded
+    flat = os.path.join(upload_dir, filename)
+    return flat if os.path.exists(flat) else sharded
+
+
+def sharded_url(url: str, upload_url: str) -> str:
+    """Rewrite a flat <upload_url>/<name> URL to its sharded form."""
+    prefix = f"{upload_url}/"
+    if not url or not url.startswith(prefix) or "/" in url[len(prefix) :]:
+        return url
+    return prefix + shard_path(url[len(prefix) :])
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+# -----------------------------
+# Store / Release
+# -----------------------------
+def upload_key(url: str) -> str:
+    """Storage key for an upload URL; any backend's URL ends in the filename."""
+    return shard_path(url.rsplit("/", 1)[-1])
+
+
+def strip_upload_metadata(upload) -> None:
+    """
+    Remove EXIF and other metadata from an upload's temp file before it is
+    stored and served. The digest is taken again, since it names the file.
+    """
+    if strip_metadata(upload.tmp_path):
+        upload.sha256 = file_sha256(upload.tmp_path)
+        upload.size = os.path.getsize(upload.tmp_path)
+
+
+def store_upload(upload, storage) -> tuple[str, bool]:
+    """
+    Hand a StreamedUpload to storage under its sharded <sha256>.<ext> key.
+    If identical content is already stored, the temp file is dropped.
+    Returns (key, created).
+    """
+    key = shard_path(content_filename(upload.sha256, upload.content_type))
+    # Touching restarts the GC and release grace periods of reused content,
+    # so a concurrent release_image leaves it alone until our project exists
+    if storage.touch(key):
+        upload.discard()
+        return key, False
+    storage.save_file(key, upload.tmp_path, upload.content_type)
+    return key, True
+
+
+def ingest_upload(upload, storage) -> str:
+    """
+    Strip a received upload's metadata and store it (see store_upload).
+    Runs in the image job, so the decode and re-hash stay off the request
+    path. Returns the storage key.
+    """
+    strip_upload_metadata(upload)
+    key, _ = store_upload(upload, storage)
+    return key
+
+
+async def find_processed_copy(digest: str) -> dict | None:
+    """Return another project whose identical image already has variants."""
+    return await projects_collection.find_one(
+        {"image_sha256": digest, "image_status": "ready"},
+        {"image_variants": 1},
+    )
+
+
+async def release_image(project: dict, storage) -> int:
+    """
+    Drop a deleted project's reference to its image. Files are removed
+    once no remaining project references the same digest. If the original
+    was stored or reused within RELEASE_GRACE_SECONDS (see store_upload),
+    the release is retried after the grace period, when the references
+    are counted again. Works for every storage backend; a retry pending
+    when the app stops is lost, which only the local upload GC makes up
+    for. A project whose upload is still in its image job has no digest
+    yet; the job releases the files when it finds the project gone.
+    Returns the number of files deleted now.
+    """
+    digest = project.get("image_sha256")
+    if not digest:
+        return 0
+
+    # Reference count = projects still pointing at this content
+    if await projects_collection.count_documents({"image_sha256": digest}, limit=1):
+        return 0
+
+    urls = [project.get("image_url", "")]
+    for variants in (project.get("image_variants") or {}).values():
+        urls.extend(v["url"] for v in variants)
+    keys = [upload_key(url) for url in urls if is_content_addressed(url.rsplit("/", 1)[-1])]
+
+    def remove_files():
+        for key in keys:
+            storage.delete(key)
+        return len(keys)
+
+    try:
+        modified = await run_in_threadpool(storage.modified, keys[0]) if keys else None
+        if modified is not None:
+            wait = RELEASE_GRACE_SECONDS - (time.time() - modified)
+            if wait > 0:
+                print(f"[INFO] Image {digest} was just uploaded; release in {wait:.0f}s.")
+                _release_later(project, storage, wait)
+                return 0
+        return await run_in_threadpool(remove_files)
+    except Exception as e:
+        print(f"[ERROR] Failed to remove files for image {digest}:", e)
+        traceback.print_exc()
+        return 0
+
+
+def _release_later(project: dict, storage, delay: float) -> None:
+    async def retry():
+        await asyncio.sleep(delay)
+        await release_image(project, storage)
+
+    task = asyncio.create_task(retry())
+    _release_tasks.add(task)
+    task.add_done_callback(_release_tasks.discard)
@@ -0,0 +1,86 @@
+from collections import OrderedDict
+import hashlib
+
+from compression import compress
+
+# Rendered pages kept per worker; keys include user-supplied query flags,
+# so the cache is a bounded LRU rather than an open-ended dict.
+PAGE_CACHE_SIZE = 16
+
+
+# -----------------------------
+# Cached Page
+# -----------------------------
+class CachedPage:
+    """
+    Rendered HTML bytes plus a strong ETag derived from their content.
+    Compressed copies are made once per encoding and kept with the page.
+    """
+
+    __slots__ = ("body", "etag", "encoded")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.encoded = {}
+
+    def encode(self, encoding: str) -> bytes:
+        """
+        Body compressed with encoding (computed on first use). This runs
+        on the request path after every cache miss, so it uses the 'fast'
+        level; 'max' is left to build-assets.
+        """
+        if encoding not in self.encoded:
+            self.encoded[encoding] = compress(self.body, encoding, level="fast")
+        return self.encoded[encoding]
+
+    def encoded_etag(self, encoding: str) -> str:
+        # Each representation needs its own strong validator
+        return f'{self.etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Evaluate an If-None-Match header against a strong ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison is what If-None-Match requires (RFC 9110 13.1.2)
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+# -----------------------------
+# Rendered Page Cache
+# -----------------------------
+class PageCache:
+    """LRU cache of rendered pages keyed by whatever the page varies on."""
+
+    def __init__(self, max_size: int = PAGE_CACHE_SIZE):
+        self.max_size = max_size
+        self._pages = OrderedDict()
+
+    def get(self, key) -> CachedPage | None:
+        page = self._pages.get(key)
+        if page is not None:
+            self._pages.move_to_end(key)
+        return page
+
+    def put(self, key, body: bytes) -> CachedPage:
+        page = CachedPage(body)
+        self._pages[key] = page
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.max_size:
+            self._pages.popitem(last=False)
+        return page
+
+    def clear(self) -> None:
+        self._pages.clear()
+
+
+homepage_cache = PageCache()
+
+# Project detail fragments for the homepage modal, keyed by
+# (shared project version, project id)
+PROJECT_FRAGMENT_CACHE_SIZE = 64
+project_fragment_cache = PageCache(PROJECT_FRAGMENT_CACHE_SIZE)
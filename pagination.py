@@ -0,0 +1,135 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bson import ObjectId, json_util
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 50))
+
+# Types allowed inside a decoded cursor; anything else (e.g. a dict smuggled
+# in as {"$ne": ...}) would turn into a query operator.
+_CURSOR_TYPES = (datetime, ObjectId, str, int, float)
+
+
+# -----------------------------
+# Page Size
+# -----------------------------
+def clamp_page_size(limit: int | None) -> int:
+    """Keep the requested page size within 1..MAX_PAGE_SIZE."""
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+# -----------------------------
+# Cursor Tokens
+# -----------------------------
+def encode_cursor(doc: dict, sort: list) -> str | None:
+    """
+    Encode the sort-key values of a document into an opaque URL-safe token.
+    Returns None when the document lacks one of them: nothing can be paged
+    past a missing key (see legacy_sort_filter).
+    """
+    values = [doc.get(field) for field, _ in sort]
+    if any(value is None for value in values):
+        return None
+    raw = json_util.dumps(values).encode("utf-8")
+    return urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str | None, sort: list) -> list | None:
+    """
+    Decode a token produced by encode_cursor.
+    Returns None for a missing, malformed or mismatched token.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json_util.loads(urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        return None
+
+    if not isinstance(values, list) or len(values) != len(sort):
+        return None
+    if not all(isinstance(value, _CURSOR_TYPES) for value in values):
+        return None
+    return values
+
+
+# -----------------------------
+# Keyset Query
+# -----------------------------
+def keyset_filter(values: list, sort: list, backwards: bool = False) -> dict:
+    """
+    Build the filter selecting documents strictly after `values` in `sort`
+    order (or strictly before them when paging backwards).
+
+    For sort keys (a, b, c) this is the lexicographic comparison
+    a < x OR (a = x AND b < y) OR (a = x AND b = y AND c < z).
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        descending = direction < 0
+        op = "$lt" if descending != backwards else "$gt"
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        clause[field] = {op: values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+# -----------------------------
+# Legacy Sort Keys
+# -----------------------------
+def legacy_sort_filter(field: str = "created_at") -> dict:
+    """
+    Documents whose date sort key is missing or not a BSON date. MongoDB
+    compares values of different types by type order, so the $lt/$gt of
+    keyset_filter never reaches them; `python manage.py migrate-dates`
+    rewrites them.
+    """
+    return {field: {"$not": {"$type": "date"}}}
+
+
+def coerce_datetime(value, doc_id=None) -> datetime | None:
+    """
+    A naive UTC datetime for a legacy date value: ISO strings are parsed,
+    anything else falls back to the creation time of the ObjectId doc_id.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            value = None
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(doc_id, ObjectId):
+        return doc_id.generation_time.replace(tzinfo=None)
+    return None
+
+
+def build_page_pipeline(
+    query: dict, sort: list, values: list | None, backwards: bool, limit: int
+) -> list:
+    """
+    Build an aggregation pipeline that returns one page plus one extra
+    document (used to detect whether another page exists).
+
+    A "score" sort key is filled from the $text relevance score so text
+    searches can be paged by relevance as well.
+    """
+    pipeline = [{"$match": query}]
+    if any(field == "score" for field, _ in sort):
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+    if values is not None:
+        pipeline.append({"$match": keyset_filter(values, sort, backwards)})
+
+    order = {field: -direction if backwards else direction for field, direction in sort}
+    pipeline.append({"$sort": order})
+    pipeline.append({"$limit": limit + 1})
+    return pipeline
@@ -0,0 +1,134 @@
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+import asyncio
+import os
+import time
+import traceback
+
+from async_database import cache_version_collection, projects_collection
+
+load_dotenv()
+
+# How long a worker trusts its copy of the shared version before asking
+# MongoDB again; another worker's change shows up within this many seconds
+PROJECT_CACHE_VERSION_TTL = float(os.getenv("PROJECT_CACHE_VERSION_TTL", 1))
+
+# _id of the project list's counter in the cache_versions collection
+PROJECTS_VERSION_ID = "projects"
+
+
+# -----------------------------
+# Project Normalization
+# -----------------------------
+def normalize_project(project: dict) -> dict:
+    """Make a project document safe to render on the public homepage."""
+    project["_id"] = str(project["_id"])  # Convert ObjectId -> string
+
+    # Ensure missing fields do not break the HTML
+    project.setdefault("title", "Untitled Project")
+    project.setdefault("category", "General")
+    project.setdefault("image_url", "/static/default.jpg")
+    project.setdefault("description", "")
+    return project
+
+
+# -----------------------------
+# Read-through Project Cache
+# -----------------------------
+class ProjectCache:
+    """
+    In-process cache of the homepage project list.
+
+    Every mutation of the projects collection must await bump(), which
+    increments a counter document in MongoDB. Each worker re-reads that
+    counter at most once per PROJECT_CACHE_VERSION_TTL seconds, so a
+    change made through one worker reaches the others within that time;
+    reads in between are served from memory.
+    """
+
+    def __init__(
+        self, collection, version_collection, version_ttl: float = PROJECT_CACHE_VERSION_TTL
+    ):
+        self.collection = collection
+        self.version_collection = version_collection
+        self.version_ttl = version_ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._projects = None
+        self._by_id = {}
+        self._loaded_version = -1
+        self._checked_at = None
+        self._lock = asyncio.Lock()
+
+    async def bump(self) -> None:
+        """Mark the list stale in every worker after a project changed."""
+        try:
+            doc = await self.version_collection.find_one_and_update(
+                {"_id": PROJECTS_VERSION_ID},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            self.version = doc["version"]
+            self._checked_at = time.monotonic()
+        except PyMongoError as e:
+            # This worker reloads; others keep their list until the next bump
+            print("[ERROR] Could not bump the shared project version:", e)
+            traceback.print_exc()
+            self._loaded_version = -1
+
+    async def current_version(self) -> int:
+        """The shared version, re-read from MongoDB once the TTL has passed."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.version_ttl:
+            return self.version
+        self._checked_at = now  # concurrent requests keep using the old value meanwhile
+        try:
+            doc = await self.version_collection.find_one({"_id": PROJECTS_VERSION_ID})
+        except PyMongoError as e:
+            print("[WARN] Could not read the shared project version:", e)
+            return self.version
+        self.version = doc["version"] if doc else 0
+        return self.version
+
+    async def get_projects(self) -> list:
+        """Return the normalized project list, newest first."""
+        version = await self.current_version()
+        if self._loaded_version == version:
+            self.hits += 1
+            return self._projects
+
+        async with self._lock:
+            # Another request may have reloaded while we waited
+            if self._loaded_version == version:
+                self.hits += 1
+                return self._projects
+
+            self.misses += 1
+            # Projects whose upload is still in its image job have no
+            # public image yet
+            cursor = self.collection.find({"image_upload": {"$exists": False}})
+            cursor = cursor.sort("created_at", -1)
+            self._projects = [normalize_project(p) async for p in cursor]
+            self._by_id = {p["_id"]: p for p in self._projects}
+            self._loaded_version = version
+            return self._projects
+
+    async def get_project(self, project_id: str) -> dict | None:
+        """One normalized project by id, from the same cached list."""
+        await self.get_projects()
+        return self._by_id.get(project_id)
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_version": self._loaded_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached_projects": len(self._projects or []),
+        }
+
+
+project_cache = ProjectCache(projects_collection, cache_version_collection)
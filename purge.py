@@ -0,0 +1,290 @@
+import glob
+import os
+import re
+
+from assets import write_text, ASSETS_DIR
+
+# Files whose text decides which selectors are in use
+PURGE_CONTENT = ["templates/*.html", "static/assets/js/main.js"]
+
+# Stylesheets to purge, relative to ASSETS_DIR. GLightbox and Swiper build
+# their markup at runtime, so their CSS is bundled in full.
+PURGE_STYLESHEETS = [
+    "vendor/bootstrap/css/bootstrap.min.css",
+    "vendor/bootstrap-icons/bootstrap-icons.css",
+    "vendor/aos/aos.css",
+    "css/main.css",
+]
+
+# Purged copies, for inspection; build-assets bundles these
+PURGED_DIR = "static/dist/purged"
+
+# Classes that vendor scripts add at runtime and never appear in our files
+PURGE_SAFELIST = {
+    # Bootstrap components
+    "show", "showing", "hiding", "fade", "collapse", "collapsing", "collapsed",
+    "modal-open", "modal-backdrop", "modal-static", "offcanvas-backdrop",
+    "pointer-event", "was-validated", "is-valid", "is-invalid",
+    # php-email-form/validate.js
+    "d-block",
+    # AOS and Typed.js
+    "aos-init", "aos-animate", "typed-cursor", "typed-cursor--blink", "typed-fade-out",
+}
+PURGE_SAFELIST_PATTERNS = [
+    re.compile(r"^(bs-)?(tooltip|popover)"),
+    re.compile(r"^carousel-item-"),
+]
+
+# Attribute selectors ([data-aos-delay="100"]) kept only when the value is used
+PURGE_ATTRIBUTE_PREFIXES = ("data-aos",)
+
+# @-rules whose blocks hold ordinary rules that can be purged one by one
+GROUPING_AT_RULES = ("@media", "@supports", "@layer", "@container")
+
+CONTENT_TOKEN_RE = re.compile(r"[A-Za-z0-9_-]+")
+FUNCTIONAL_PSEUDO_RE = re.compile(r":(?:not|is|where|has)\((?:[^()]|\([^()]*\))*\)")
+ATTRIBUTE_RE = re.compile(r"""\[\s*([\w-]+)\s*(?:([~|^$*]?=)\s*(['"]?)(.*?)\3\s*)?\]""")
+SELECTOR_NAME_RE = re.compile(r"[.#]((?:\\.|[\w-])+)")
+PSEUDO_RE = re.compile(r"::?[\w-]+")
+TYPE_SELECTOR_RE = re.compile(r"(?<![\w-])[a-zA-Z][\w-]*")
+KEYFRAMES_RE = re.compile(r"^@(?:-webkit-)?keyframes\s+([\w-]+)")
+FONT_FAMILY_RE = re.compile(r"font-family:\s*['\"]?([^'\";]+)")
+
+
+# -----------------------------
+# Used Names
+# -----------------------------
+def content_tokens(patterns: list = PURGE_CONTENT) -> set:
+    """
+    Every word-like token in the content files. Deliberately loose: a
+    class mentioned anywhere (markup, Jinja, a JS string) counts as used.
+    """
+    tokens = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern):
+            with open(path, encoding="utf-8") as f:
+                tokens.update(CONTENT_TOKEN_RE.findall(f.read()))
+    return tokens
+
+
+def _is_used(name: str, used: set, safelist: bool = True) -> bool:
+    if name in used:
+        return True
+    return safelist and (
+        name in PURGE_SAFELIST
+        or any(pattern.match(name) for pattern in PURGE_SAFELIST_PATTERNS)
+    )
+
+
+def _keep_selector(selector: str, used: set, strict: bool = False) -> bool:
+    # Classes inside :not() etc. need not be present for the rule to apply
+    bare = FUNCTIONAL_PSEUDO_RE.sub("", selector)
+    for attr, operator, _, value in ATTRIBUTE_RE.findall(bare):
+        if strict and attr not in used:
+            return False
+        if strict or attr.startswith(PURGE_ATTRIBUTE_PREFIXES):
+            if operator == "=" and value not in used:
+                return False
+    bare = ATTRIBUTE_RE.sub("", bare)
+    names = SELECTOR_NAME_RE.findall(bare)
+    if not all(_is_used(name.replace("\\", ""), used, not strict) for name in names):
+        return False
+    if strict:
+        # Element names must appear in the markup too
+        bare = re.sub(r"\([^()]*\)", "", SELECTOR_NAME_RE.sub("", PSEUDO_RE.sub("", bare)))
+        return all(tag.lower() in used for tag in TYPE_SELECTOR_RE.findall(bare))
+    return True
+
+
+# -----------------------------
+# CSS Parsing
+# -----------------------------
+def _skip_string(css: str, i: int) -> int:
+    quote = css[i]
+    i += 1
+    while i < len(css):
+        if css[i] == "\\":
+            i += 2
+            continue
+        if css[i] == quote:
+            return i + 1
+        i += 1
+    return i
+
+
+def _skip_comment(css: str, i: int) -> int:
+    end = css.find("*/", i + 2)
+    return len(css) if end < 0 else end + 2
+
+
+def _block_end(css: str, i: int) -> int:
+    """Index of the brace closing the block whose body starts at i."""
+    depth = 1
+    while i < len(css):
+        if css[i] in "\"'":
+            i = _skip_string(css, i)
+            continue
+        if css.startswith("/*", i):
+            i = _skip_comment(css, i)
+            continue
+        if css[i] == "{":
+            depth += 1
+        elif css[i] == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return i
+
+
+def _parse(css: str, i: int = 0):
+    """
+    Parse rules up to the end of the current block into nodes:
+    ("comment", text), ("statement", text), ("rule", prelude, body) and
+    ("group", prelude, children). Returns (nodes, index after the block).
+    Comments other than /*! license */ comments are dropped.
+    """
+    nodes, start = [], i
+    while i < len(css):
+        c = css[i]
+        if c in "\"'":
+            i = _skip_string(css, i)
+        elif css.startswith("/*", i):
+            end = _skip_comment(css, i)
+            if not css[start:i].strip():
+                if css.startswith("/*!", i):
+                    nodes.append(("comment", css[i:end]))
+                start = end
+            i = end
+        elif c == ";":
+            if css[start:i].strip():
+                nodes.append(("statement", css[start:i].strip() + ";"))
+            i += 1
+            start = i
+        elif c == "{":
+            prelude = css[start:i].strip()
+            if prelude.lower().startswith(GROUPING_AT_RULES):
+                children, i = _parse(css, i + 1)
+                nodes.append(("group", prelude, children))
+            else:
+                end = _block_end(css, i + 1)
+                nodes.append(("rule", prelude, css[i + 1:end]))
+                i = end + 1
+            start = i
+        elif c == "}":
+            return nodes, i + 1
+        else:
+            i += 1
+    return nodes, i
+
+
+def _split_selectors(prelude: str) -> list:
+    """Split a selector list on top-level commas."""
+    selectors, depth, start = [], 0, 0
+    for i, c in enumerate(prelude):
+        if c in "([":
+            depth += 1
+        elif c in ")]":
+            depth -= 1
+        elif c == "," and depth == 0:
+            selectors.append(prelude[start:i].strip())
+            start = i + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+def _purge_nodes(nodes: list, used: set, strict: bool = False) -> list:
+    kept = []
+    for node in nodes:
+        if node[0] == "group":
+            children = _purge_nodes(node[2], used, strict)
+            if children:
+                kept.append(("group", node[1], children))
+        elif node[0] == "rule" and not node[1].startswith("@"):
+            selectors = [
+                s for s in _split_selectors(node[1]) if _keep_selector(s, used, strict)
+            ]
+            if selectors:
+                kept.append(("rule", ",".join(selectors), node[2]))
+        else:
+            # @font-face, @keyframes, @charset, license comments
+            kept.append(node)
+    return kept
+
+
+def _drop_unreferenced(nodes: list, bodies: str) -> list:
+    """Drop @keyframes and @font-face blocks no remaining declaration uses."""
+    kept = []
+    for node in nodes:
+        if node[0] == "group":
+            children = _drop_unreferenced(node[2], bodies)
+            if children:
+                kept.append(("group", node[1], children))
+            continue
+        if node[0] == "rule":
+            match = KEYFRAMES_RE.match(node[1])
+            if match and match[1] not in bodies:
+                continue
+            family = FONT_FAMILY_RE.search(node[2]) if node[1] == "@font-face" else None
+            if family and family[1].strip() not in bodies:
+                continue
+        kept.append(node)
+    return kept
+
+
+def _style_bodies(nodes: list) -> str:
+    return "\n".join(
+        _style_bodies(node[2]) if node[0] == "group" else node[2]
+        for node in nodes
+        if node[0] == "group" or (node[0] == "rule" and not node[1].startswith("@"))
+    )
+
+
+def _serialize(nodes: list) -> str:
+    out = []
+    for node in nodes:
+        if node[0] in ("comment", "statement"):
+            out.append(node[1])
+        elif node[0] == "group":
+            out.append(f"{node[1]}{{\n{_serialize(node[2])}\n}}")
+        else:
+            out.append(f"{node[1]}{{{node[2]}}}")
+    return "\n".join(out)
+
+
+def purge_css(css: str, used: set, strict: bool = False) -> str:
+    """
+    Drop style rules whose selectors name classes/IDs nothing uses.
+    strict (for critical CSS) ignores the runtime safelist, also requires
+    element and attribute names to be used, and drops @keyframes and
+    @font-face blocks the remaining rules do not reference.
+    """
+    nodes, _ = _parse(css)
+    nodes = _purge_nodes(nodes, used, strict)
+    if strict:
+        nodes = _drop_unreferenced(nodes, _style_bodies(nodes))
+    return _serialize(nodes) + "\n"
+
+
+# -----------------------------
+# Build
+# -----------------------------
+def purge_stylesheets(
+    assets_dir: str = ASSETS_DIR, out_dir: str = PURGED_DIR, replaced: dict = None
+) -> dict:
+    """
+    Purge every stylesheet in PURGE_STYLESHEETS against the content files
+    and write the results under out_dir. replaced maps a stylesheet to
+    the text to purge instead of the file (the icon font subset's CSS).
+    Returns {relpath: purged css}.
+    """
+    used = content_tokens()
+    purged = {}
+    for relpath in PURGE_STYLESHEETS:
+        css = (replaced or {}).get(relpath)
+        if css is None:
+            with open(os.path.join(assets_dir, *relpath.split("/")), encoding="utf-8") as f:
+                css = f.read()
+        purged[relpath] = purge_css(css, used)
+        write_text(os.path.join(out_dir, *relpath.split("/")), purged[relpath])
+    return purged
@@ -0,0 +1,133 @@
+from pymongo import DESCENDING
+from dotenv import load_dotenv
+import os
+import re
+
+load_dotenv()
+
+# Fields searched by the admin message dashboard
+SEARCH_FIELDS = ["name", "email", "subject", "message"]
+
+# Relative text-index weights: sender and subject hits outrank body hits
+SEARCH_WEIGHTS = {"name": 5, "email": 5, "subject": 3, "message": 1}
+
+# Search modes accepted by /admin/messages
+TEXT_MODE = "text"
+REGEX_MODE = "regex"
+SEARCH_MODES = (TEXT_MODE, REGEX_MODE)
+
+# Sort keys (always ending in _id so keyset pagination is unambiguous).
+# "score" is the $text relevance score, filled in by the page pipeline.
+RECENT_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+RELEVANCE_SORT = [("score", DESCENDING)] + RECENT_SORT
+
+# Hard limits applied to every dashboard search
+SEARCH_MAX_LENGTH = int(os.getenv("SEARCH_MAX_LENGTH", 100))
+SEARCH_MAX_TIME_MS = int(os.getenv("SEARCH_MAX_TIME_MS", 2000))
+
+# Advanced syntax tokens: optional "field:" prefix followed by a
+# "quoted phrase", a /regex/ or a bare word.
+_TOKEN_RE = re.compile(
+    r'(?:(?P<field>[a-z]+):)?(?:"(?P<phrase>[^"]+)"|/(?P<regex>[^/]+)/|(?P<word>\S+))'
+)
+
+
+# -----------------------------
+# Input Normalization
+# -----------------------------
+def normalize_search(search: str | None) -> str:
+    """Strip the raw search box value and cap it at SEARCH_MAX_LENGTH."""
+    if not search:
+        return ""
+    return search.strip()[:SEARCH_MAX_LENGTH]
+
+
+def _regex_clause(pattern: str, fields=SEARCH_FIELDS) -> dict:
+    clauses = [{field: {"$regex": pattern, "$options": "i"}} for field in fields]
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def _safe_regex(pattern: str) -> str:
+    """Return the pattern if it compiles, otherwise its escaped literal form."""
+    try:
+        re.compile(pattern)
+        return pattern
+    except re.error:
+        return re.escape(pattern)
+
+
+def _plain_text_terms(search: str) -> str:
+    """Drop $text operators (quotes and leading '-') so input is matched as words."""
+    words = search.replace('"', " ").split()
+    return " ".join(word.lstrip("-") for word in words if word.lstrip("-"))
+
+
+# -----------------------------
+# Advanced Syntax
+# -----------------------------
+def _compile_advanced(search: str, mode: str):
+    """
+    Compile the opt-in advanced syntax into (clauses, text_terms).
+
+    Supported tokens:
+        name:/email:/subject:/message:<term>  restrict a term to one field
+        "exact phrase"                        phrase match
+        /pattern/                             raw regular expression
+        -word                                 exclude word (text mode only)
+    """
+    clauses = []
+    text_terms = []
+
+    for token in _TOKEN_RE.finditer(search):
+        field = token.group("field")
+        phrase = token.group("phrase")
+        regex = token.group("regex")
+        word = token.group("word")
+
+        if field and field not in SEARCH_FIELDS:
+            # Unknown prefix: treat "foo:bar" as a literal word
+            word = f"{field}:{phrase or regex or word}"
+            field = phrase = regex = None
+        fields = [field] if field else SEARCH_FIELDS
+
+        if regex:
+            clauses.append(_regex_clause(_safe_regex(regex), fields))
+        elif mode == TEXT_MODE and not field:
+            text_terms.append(f'"{phrase}"' if phrase else word)
+        else:
+            clauses.append(_regex_clause(re.escape(phrase or word), fields))
+
+    return clauses, text_terms
+
+
+# -----------------------------
+# Message Search Compiler
+# -----------------------------
+def build_message_search(search: str | None, mode: str = TEXT_MODE, advanced=False):
+    """
+    Build the (query, sort) pair for the message dashboard.
+
+    Input is capped at SEARCH_MAX_LENGTH and, unless advanced is set, treated
+    as literal text: regex mode escapes it and text mode strips the $text
+    operators. The default text mode uses the contacts text index and ranks
+    results by relevance; regex mode is only used when explicitly requested.
+    """
+    search = normalize_search(search)
+    if not search:
+        return {}, RECENT_SORT
+
+    if advanced:
+        clauses, text_terms = _compile_advanced(search, mode)
+    elif mode == REGEX_MODE:
+        clauses, text_terms = [_regex_clause(re.escape(search))], []
+    else:
+        clauses, text_terms = [], [_plain_text_terms(search)]
+
+    text_search = " ".join(term for term in text_terms if term)
+    if text_search:
+        clauses.insert(0, {"$text": {"$search": text_search}})
+
+    if not clauses:
+        return {}, RECENT_SORT
+    query = clauses[0] if len(clauses) == 1 else {"$and": clauses}
+    return query, RELEVANCE_SORT if text_search else RECENT_SORT
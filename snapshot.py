@@ -0,0 +1,45 @@
+from dotenv import load_dotenv
+import os
+import tempfile
+
+load_dotenv()
+
+# When enabled, GET / serves a pre-rendered copy of index.html that is
+# rewritten whenever a project is uploaded, edited or deleted.
+SNAPSHOT_MODE = os.getenv("SNAPSHOT_MODE", "false").lower() in ("1", "true", "yes")
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_PATH = os.path.join(SNAPSHOT_DIR, "index.html")
+
+
+# -----------------------------
+# Snapshot File
+# -----------------------------
+def write_snapshot(body: bytes, path: str = SNAPSHOT_PATH) -> None:
+    """Atomically replace the snapshot so readers never see a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".index-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(body)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def snapshot_version(path: str = SNAPSHOT_PATH) -> int | None:
+    """Return the snapshot's mtime in ns (used as a cache key), or None if missing."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def read_snapshot(path: str = SNAPSHOT_PATH) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
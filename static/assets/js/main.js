@@ -214,6 +214,44 @@
   }
   window.addEventListener("load", navmenuScrollspy);
   document.addEventListener("scroll", navmenuScrollspy);
+
+  /** Project Modal: fetch the clicked project's detail fragment on open */
+  const projectModal = document.querySelector("#projectModal");
+  if (projectModal) {
+    const modalContent = projectModal.querySelector(".modal-content");
+    const loadingContent = modalContent.innerHTML;
+    const fragments = new Map();
+
+    projectModal.addEventListener("show.bs.modal", (event) => {
+      const url = event.relatedTarget?.dataset.projectUrl;
+      if (!url) return;
+      modalContent.innerHTML = loadingContent;
+      modalContent.dataset.projectUrl = url;
+
+      if (!fragments.has(url)) {
+        fragments.set(
+          url,
+          fetch(url).then((response) => {
+            if (!response.ok) throw new Error(`${response.status}`);
+            return response.text();
+          })
+        );
+      }
+      fragments
+        .get(url)
+        .then((html) => {
+          // Ignore a slow response for a modal that was reopened meanwhile
+          if (modalContent.dataset.projectUrl === url) modalContent.innerHTML = html;
+        })
+        .catch((error) => {
+          fragments.delete(url);
+          modalContent.querySelector(".modal-title").textContent =
+            "Could not load this project.";
+          modalContent.querySelector(".modal-body").textContent = "";
+          console.error("Error loading project:", error);
+        });
+    });
+  }
 })();
 
 /**
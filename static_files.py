@@ -0,0 +1,113 @@
+from fastapi.staticfiles import StaticFiles
+from starlette.staticfiles import NotModifiedResponse
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Scope
+import mimetypes
+import os
+
+from assets import asset_manifest, FINGERPRINT_RE
+from compression import choose_encodings, is_compressible, ENCODING_SUFFIXES
+from media import is_content_addressed, shard_path
+
+# Sent for URLs whose content can never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+# -----------------------------
+# Static Files with Cache Headers
+# -----------------------------
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that marks content-addressed files as immutable.
+
+    Uploads are stored as <sha256>.<ext> (and <sha256>-<width>.<ext> for
+    variants), and site assets are linked as <name>.<hash>.<ext> through
+    asset_url(), so those URLs always map to the same bytes and browsers
+    and CDNs may cache them for a year without revalidating. Legacy flat
+    upload URLs are resolved to their sharded location.
+
+    Text assets are sent from their build-time .br/.gz siblings when the
+    client accepts that encoding, so nothing is compressed per request.
+    """
+
+    def is_immutable(self, path: str) -> bool:
+        parts = path.split(os.sep)
+        if parts[0] == "uploads":
+            return is_content_addressed(parts[-1])
+        if parts[0] == "assets":
+            return asset_manifest.resolve("/".join(parts[1:])) is not None
+        return False
+
+    def unfingerprint(self, relpath: str) -> str | None:
+        """Original asset path for a fingerprinted one."""
+        original = asset_manifest.resolve(relpath)
+        if original is None:
+            # Hash from an older deploy (e.g. a cached page): serve the
+            # current file, which is_immutable() will not mark as immutable.
+            match = FINGERPRINT_RE.match(relpath)
+            if match:
+                original = match["stem"] + match["ext"]
+        return original
+
+    def lookup_path(self, path: str):
+        if os.path.basename(path).startswith("."):
+            # Upload temp files (.upload-*.part) still carry their metadata
+            return "", None
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is None:
+            parts = path.split(os.sep)
+            if parts[0] == "uploads" and len(parts) == 2:
+                # Old flat /static/uploads/<name> URLs keep working after the
+                # file has been moved into its shard by migrate-uploads.
+                sharded = os.path.join("uploads", *shard_path(parts[1]).split("/"))
+                return super().lookup_path(sharded)
+            if parts[0] == "assets":
+                original = self.unfingerprint("/".join(parts[1:]))
+                if original:
+                    return super().lookup_path(
+                        os.path.join("assets", *original.split("/"))
+                    )
+        return full_path, stat_result
+
+    def precompressed(self, full_path, stat_result, accept_encoding: str):
+        """
+        Best precompressed sibling the client accepts, as
+        (encoding, path, stat). Siblings older than the source are ignored.
+        """
+        for encoding in choose_encodings(accept_encoding):
+            sibling = f"{full_path}{ENCODING_SUFFIXES[encoding]}"
+            try:
+                sibling_stat = os.stat(sibling)
+            except OSError:
+                continue
+            if sibling_stat.st_mtime >= stat_result.st_mtime:
+                return encoding, sibling, sibling_stat
+        return None, full_path, stat_result
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        headers = {}
+        if self.is_immutable(self.get_path(scope)):
+            headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        if is_compressible(str(full_path)):
+            # The body depends on Accept-Encoding even when sent uncompressed
+            headers["Vary"] = "Accept-Encoding"
+            encoding, full_path, stat_result = self.precompressed(
+                full_path, stat_result, request_headers.get("accept-encoding", "")
+            )
+            if encoding:
+                headers["Content-Encoding"] = encoding
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers=headers,
+            media_type=media_type,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,257 @@
+from dotenv import load_dotenv
+import mimetypes
+import os
+import posixpath
+import shutil
+import tempfile
+
+from media import is_content_addressed, locate_upload
+from static_files import IMMUTABLE_CACHE_CONTROL
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # only needed for STORAGE_BACKEND=s3
+    boto3 = None
+
+load_dotenv()
+
+# "local" keeps uploads under UPLOAD_DIR, served by the /static mount;
+# "s3" puts them in an S3-compatible bucket (AWS, MinIO, R2, ...)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+
+UPLOAD_DIR = "static/uploads"
+UPLOAD_URL = "/static/uploads"
+
+# Redirect route used for private buckets (see S3Storage.url)
+MEDIA_URL = "/media"
+
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_PREFIX = os.getenv("S3_PREFIX", "uploads/")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.getenv("S3_REGION")
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")  # bucket website or CDN origin, if public
+S3_URL_EXPIRY = int(os.getenv("S3_URL_EXPIRY", 3600))
+
+
+def _content_type(key: str, content_type: str = None) -> str:
+    return content_type or mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+# -----------------------------
+# Storage Interface
+# -----------------------------
+class Storage:
+    """
+    Where uploaded media lives. Keys are sharded relative paths such as
+    'ab/cd/<sha256>.jpg' (see media.shard_path). All methods block, so
+    call them through run_in_threadpool from async code.
+    """
+
+    # Local directory for in-flight uploads and image job scratch files
+    scratch_dir = tempfile.gettempdir()
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def save_file(self, key: str, path: str, content_type: str = None) -> None:
+        """Store a local file under key. The local file is consumed."""
+        raise NotImplementedError
+
+    def fetch(self, key: str, scratch_dir: str) -> str:
+        """Return a local path holding the object's bytes."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        """Stable URL saved on the project document."""
+        raise NotImplementedError
+
+    def signed_url(self, key: str) -> str:
+        """Short-lived URL for the /media redirect route."""
+        return self.url(key)
+
+    def modified(self, key: str) -> float | None:
+        """Last modification (or touch) time as a Unix timestamp; None if missing."""
+        raise NotImplementedError
+
+    def touch(self, key: str) -> bool:
+        """
+        Mark an existing object as recently used (for upload GC and
+        media.release_image). Returns False if there is no such object.
+        """
+        return self.exists(key)
+
+
+# -----------------------------
+# Local Filesystem
+# -----------------------------
+class LocalStorage(Storage):
+    """Files under root, served by the app's CachedStaticFiles mount."""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = root
+        self.base_url = base_url
+        self.scratch_dir = root  # temp files rename into place on the same disk
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return locate_upload(self.root, posixpath.basename(key))
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def save_file(self, key, path, content_type=None):
+        dest = os.path.join(self.root, *key.split("/"))
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.move(path, dest)
+
+    def fetch(self, key, scratch_dir):
+        return self.path(key)
+
+    def delete(self, key):
+        path = self.path(key)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        # Prune shard directories left empty
+        parent = os.path.dirname(path)
+        while os.path.abspath(parent) != os.path.abspath(self.root):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+    def modified(self, key):
+        try:
+            return os.path.getmtime(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def touch(self, key):
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+
+# -----------------------------
+# S3-compatible Object Storage
+# -----------------------------
+class S3Storage(Storage):
+    """
+    Objects in an S3 bucket. Media bytes never pass through the app:
+    with S3_PUBLIC_URL set, pages link straight to the bucket/CDN;
+    otherwise they link to /media/<key>, which redirects to a presigned
+    GET URL.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: str = None,
+        region: str = None,
+        public_url: str = None,
+        url_expiry: int = 3600,
+    ):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3).")
+        if not bucket:
+            raise RuntimeError("S3_BUCKET must be set for STORAGE_BACKEND=s3.")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.url_expiry = url_expiry
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _head(self, key: str) -> dict | None:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def modified(self, key):
+        head = self._head(key)
+        return head["LastModified"].timestamp() if head else None
+
+    def touch(self, key):
+        # Copying an object onto itself is the only way to bump LastModified;
+        # REPLACE requires restating the headers that should be kept
+        head = self._head(key)
+        if head is None:
+            return False
+        extra = {"ContentType": head.get("ContentType") or _content_type(key)}
+        if head.get("CacheControl"):
+            extra["CacheControl"] = head["CacheControl"]
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=self.object_key(key),
+            CopySource={"Bucket": self.bucket, "Key": self.object_key(key)},
+            MetadataDirective="REPLACE",
+            **extra,
+        )
+        return True
+
+    def save_file(self, key, path, content_type=None):
+        extra = {"ContentType": _content_type(key, content_type)}
+        if is_content_addressed(posixpath.basename(key)):
+            extra["CacheControl"] = IMMUTABLE_CACHE_CONTROL
+        # upload_file streams from disk in multipart chunks
+        self.client.upload_file(path, self.bucket, self.object_key(key), ExtraArgs=extra)
+        os.unlink(path)
+
+    def fetch(self, key, scratch_dir):
+        fd, path = tempfile.mkstemp(dir=scratch_dir, suffix=posixpath.splitext(key)[1])
+        os.close(fd)
+        self.client.download_file(self.bucket, self.object_key(key), path)
+        return path
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def url(self, key):
+        if self.public_url:
+            return f"{self.public_url}/{self.object_key(key)}"
+        return f"{MEDIA_URL}/{key}"
+
+    def signed_url(self, key):
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.object_key(key)},
+            ExpiresIn=self.url_expiry,
+        )
+
+
+def build_storage() -> Storage:
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(
+            S3_BUCKET,
+            prefix=S3_PREFIX,
+            endpoint_url=S3_ENDPOINT_URL,
+            region=S3_REGION,
+            public_url=S3_PUBLIC_URL,
+            url_expiry=S3_URL_EXPIRY,
+        )
+    if STORAGE_BACKEND != "local":
+        raise RuntimeError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}'.")
+    return LocalStorage(UPLOAD_DIR, UPLOAD_URL)
+
+
+media_storage = build_storage()
@@ -0,0 +1,30 @@
+import gzip
+
+from compression import accepted_encodings, choose_encodings, compress, ENCODINGS
+
+
+def test_accepted_encodings_honours_q_values():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0.5, gzip; q=1.0") == {"br", "gzip"}
+    assert accepted_encodings("br;q=0, gzip") == {"gzip"}
+    assert accepted_encodings("GZIP") == {"gzip"}
+    assert accepted_encodings("gzip;q=abc") == set()  # malformed q counts as 0
+    assert accepted_encodings("") == set()
+
+
+def test_wildcard_does_not_override_explicit_refusal():
+    assert "gzip" in accepted_encodings("*")
+    assert "gzip" not in accepted_encodings("gzip;q=0, *")
+    assert choose_encodings("*;q=0") == []
+
+
+def test_choose_encodings_prefers_brotli():
+    assert choose_encodings("gzip, br") == list(ENCODINGS)
+    assert choose_encodings(None) == []
+    assert choose_encodings("identity") == []
+
+
+def test_compress_is_reproducible():
+    body = b"<html>" + b"hello " * 200 + b"</html>"
+    assert compress(body, "gzip") == compress(body, "gzip")
+    assert gzip.decompress(compress(body, "gzip", level="fast")) == body
@@ -0,0 +1,52 @@
+from PIL import Image
+
+from images import VARIANT_WIDTHS, _target_widths, process_image, strip_metadata
+
+
+def _png(path, width, height):
+    Image.new("RGB", (width, height), (200, 30, 30)).save(path, "PNG")
+    return str(path)
+
+
+def test_target_widths_are_distinct_for_wide_sources():
+    assert _target_widths(2000) == VARIANT_WIDTHS
+    assert _target_widths(1600) == VARIANT_WIDTHS
+    assert _target_widths(1200) == [320, 640, 1024, 1200]
+    assert _target_widths(200) == [200]
+
+
+def test_process_image_wider_than_largest_variant(tmp_path):
+    src = _png(tmp_path / "wide.png", 2000, 1000)
+    out = tmp_path / "out"
+    out.mkdir()
+
+    variants = process_image(src, str(out), "digest")
+
+    for name in ("webp", "jpeg"):
+        widths = [v["width"] for v in variants[name]]
+        assert widths == VARIANT_WIDTHS
+        filenames = [v["filename"] for v in variants[name]]
+        assert len(filenames) == len(set(filenames))
+        assert all((out / f).exists() for f in filenames)
+    assert variants["jpeg"][-1]["height"] == 800
+
+
+def test_strip_metadata_rotates_and_drops_exif(tmp_path):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotate 90 degrees clockwise
+    exif[0x010F] = "Camera maker"
+    path = str(tmp_path / "photo.jpg")
+    Image.new("RGB", (40, 20)).save(path, "JPEG", exif=exif.tobytes())
+
+    assert strip_metadata(path)
+    with Image.open(path) as img:
+        assert img.size == (20, 40)
+        assert not img.getexif()
+    assert not strip_metadata(path)  # nothing left to strip
+
+
+def test_strip_metadata_leaves_clean_files_untouched(tmp_path):
+    path = _png(tmp_path / "clean.png", 30, 30)
+    before = open(path, "rb").read()
+    assert not strip_metadata(path)
+    assert open(path, "rb").read() == before
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+from PIL import Image
+
+import jobs
+import media
+from images import process_image
+from storage import LocalStorage
+from uploads import StreamedUpload
+
+
+def test_each_job_is_claimed_once(monkeypatch):
+    async def scenario():
+        projects = AsyncMongoMockClient()["portfolio_test"]["projects"]
+        monkeypatch.setattr(jobs, "projects_collection", projects)
+        stale = datetime.utcnow() - jobs.IMAGE_JOB_TIMEOUT - timedelta(minutes=1)
+        await projects.insert_many(
+            [
+                {"title": "pending", "image_status": jobs.IMAGE_PENDING},
+                {"title": "running", **jobs.claimed_job_fields()},
+                {
+                    "title": "abandoned",
+                    "image_status": jobs.IMAGE_PROCESSING,
+                    "image_claimed_at": stale,
+                },
+                {"title": "done", "image_status": jobs.IMAGE_READY},
+            ]
+        )
+        # Two workers resuming at the same time split the jobs between them
+        first, second, third = await asyncio.gather(
+            jobs.claim_image_job(), jobs.claim_image_job(), jobs.claim_image_job()
+        )
+        claimed = [doc["_id"] for doc in (first, second, third) if doc is not None]
+        titles = {doc["title"] async for doc in projects.find({"_id": {"$in": claimed}})}
+        assert titles == {"pending", "abandoned"}
+        assert await projects.count_documents({"image_status": jobs.IMAGE_PROCESSING}) == 3
+
+    asyncio.run(scenario())
+
+
+def test_pool_runs_image_work_in_spawned_processes(tmp_path):
+    src = tmp_path / "src.png"
+    Image.new("RGB", (400, 200)).save(src)
+    try:
+        assert jobs.get_pool()._mp_context.get_start_method() == "spawn"
+        future = jobs.get_pool().submit(process_image, str(src), str(tmp_path), "img")
+        variants = future.result(timeout=60)
+    finally:
+        jobs.shutdown_pool()
+    assert [v["width"] for v in variants["webp"]] == [320, 400]
+
+
+def test_variants_of_a_deleted_project_are_released(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path / "uploads"), "/static/uploads")
+    digest = "cd" * 32
+    key = f"cd/cd/{digest}.png"
+
+    async def fake_variants(key, stem):
+        variant_key = f"cd/cd/{stem}-320.webp"
+        storage.save_file(variant_key, str(_file(tmp_path / "v.webp")))
+        return {"webp": [{"width": 320, "height": 160, "url": storage.url(variant_key)}]}
+
+    async def scenario():
+        projects = AsyncMongoMockClient()["portfolio_test"]["projects"]
+        monkeypatch.setattr(jobs, "projects_collection", projects)
+        monkeypatch.setattr(media, "projects_collection", projects)
+        monkeypatch.setattr(jobs, "media_storage", storage)
+        monkeypatch.setattr(jobs, "build_variants", fake_variants)
+        monkeypatch.setattr(media, "RELEASE_GRACE_SECONDS", 0)
+
+        async def on_done():
+            raise AssertionError("no project left to refresh")
+
+        # The project document is already gone when the job finishes
+        project = {"_id": "deleted-id", "image_url": storage.url(key)}
+        await jobs.run_image_job(project, on_done)
+
+    asyncio.run(scenario())
+    assert not storage.exists(f"cd/cd/{digest}-320.webp")
+
+
+def test_job_stores_the_upload_without_its_metadata(tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path / "uploads"), "/static/uploads")
+    src = tmp_path / "uploads" / ".upload-test.part"
+    exif = Image.Exif()
+    exif[0x010F] = "Camera maker"
+    Image.new("RGB", (64, 32), "red").save(src, "JPEG", exif=exif)
+    upload = StreamedUpload("photo.jpg", "image/jpeg", str(src))
+    upload.size = src.stat().st_size
+    upload.sha256 = media.file_sha256(str(src))
+
+    async def fake_variants(key, stem):
+        return {"webp": []}
+
+    async def scenario():
+        projects = AsyncMongoMockClient()["portfolio_test"]["projects"]
+        monkeypatch.setattr(jobs, "projects_collection", projects)
+        monkeypatch.setattr(media, "projects_collection", projects)
+        monkeypatch.setattr(jobs, "media_storage", storage)
+        monkeypatch.setattr(jobs, "build_variants", fake_variants)
+        refreshed = []
+
+        async def on_done():
+            refreshed.append(True)
+
+        project = {"image_upload": upload.to_document(), **jobs.claimed_job_fields()}
+        await projects.insert_one(project)
+        await jobs.run_image_job(project, on_done)
+        assert refreshed
+        return await projects.find_one({"_id": project["_id"]})
+
+    project = asyncio.run(scenario())
+    assert project["image_status"] == jobs.IMAGE_READY
+    assert "image_upload" not in project and not src.exists()
+    assert project["image_sha256"] != upload.sha256
+    path = tmp_path / "uploads" / media.upload_key(project["image_url"])
+    with Image.open(path) as stored:
+        assert not stored.getexif()
+    assert project["image_size"] == path.stat().st_size
+
+
+def _file(path):
+    path.write_bytes(b"variant")
+    return path
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import time
+
+import media
+from media import content_filename, release_image, shard_path, store_upload
+from storage import LocalStorage
+from uploads import StreamedUpload
+
+DIGEST = "ab" * 32
+
+
+class _NoReferences:
+    """Stands in for projects_collection: the released image has no other users."""
+
+    async def count_documents(self, query, limit=0):
+        return 0
+
+
+def _upload(tmp_path, data=b"image bytes"):
+    path = tmp_path / "upload.part"
+    path.write_bytes(data)
+    upload = StreamedUpload("a.png", "image/png", str(path))
+    upload.sha256 = DIGEST
+    return upload
+
+
+def _project(storage):
+    key = shard_path(content_filename(DIGEST, "image/png"))
+    return {"image_sha256": DIGEST, "image_url": storage.url(key)}
+
+
+def test_store_upload_reuses_and_touches_existing_content(tmp_path):
+    storage = LocalStorage(str(tmp_path / "uploads"), "/static/uploads")
+    key, created = store_upload(_upload(tmp_path), storage)
+    assert created
+    os.utime(storage.path(key), (0, 0))
+
+    upload = _upload(tmp_path)
+    assert store_upload(upload, storage) == (key, False)
+    assert not os.path.exists(upload.tmp_path)
+    assert storage.modified(key) > time.time() - 60
+
+
+def test_release_image_spares_recently_reused_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(media, "projects_collection", _NoReferences())
+    storage = LocalStorage(str(tmp_path / "uploads"), "/static/uploads")
+    key, _ = store_upload(_upload(tmp_path), storage)
+
+    assert asyncio.run(release_image(_project(storage), storage)) == 0
+    assert storage.exists(key)
+
+    os.utime(storage.path(key), (0, 0))  # older than the grace period
+    assert asyncio.run(release_image(_project(storage), storage)) == 1
+    assert not storage.exists(key)
+    assert not storage.touch(key)
+
+
+def test_release_image_retries_after_the_grace_period(tmp_path, monkeypatch):
+    monkeypatch.setattr(media, "projects_collection", _NoReferences())
+    monkeypatch.setattr(media, "RELEASE_GRACE_SECONDS", 0.2)
+    storage = LocalStorage(str(tmp_path / "uploads"), "/static/uploads")
+    key, _ = store_upload(_upload(tmp_path), storage)
+
+    async def scenario():
+        assert await release_image(_project(storage), storage) == 0
+        assert storage.exists(key)
+        await asyncio.sleep(0.5)  # the deferred release runs
+
+    asyncio.run(scenario())
+    assert not storage.exists(key)
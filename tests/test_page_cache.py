@@ -0,0 +1,34 @@
+import gzip
+
+from page_cache import CachedPage, PageCache, etag_matches
+
+ETAG = '"abc123"'
+
+
+def test_etag_matches():
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches("", ETAG)
+    assert etag_matches("*", ETAG)
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(f'"other", {ETAG}', ETAG)
+    assert etag_matches(f"W/{ETAG}", ETAG)  # If-None-Match uses weak comparison
+    assert not etag_matches('"abc"', ETAG)
+    assert not etag_matches("abc123", ETAG)  # unquoted
+
+
+def test_cached_page_etags_and_encoding():
+    page = CachedPage(b"<p>hello</p>" * 100)
+    assert page.etag == CachedPage(page.body).etag
+    assert page.encoded_etag("gzip") == page.etag[:-1] + '-gzip"'
+    assert gzip.decompress(page.encode("gzip")) == page.body
+    assert page.encode("gzip") is page.encode("gzip")  # compressed once
+
+
+def test_page_cache_evicts_least_recently_used():
+    cache = PageCache(max_size=2)
+    cache.put("a", b"a")
+    cache.put("b", b"b")
+    cache.get("a")
+    cache.put("c", b"c")
+    assert cache.get("b") is None
+    assert cache.get("a").body == b"a"
@@ -0,0 +1,68 @@
+from base64 import urlsafe_b64encode
+from datetime import datetime
+
+from bson import ObjectId, json_util
+
+from pagination import (
+    coerce_datetime,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    legacy_sort_filter,
+)
+
+SORT = [("created_at", -1), ("_id", -1)]
+
+
+def test_encode_cursor_needs_every_sort_key():
+    doc = {"_id": ObjectId(), "created_at": datetime(2024, 1, 2, 3, 4, 5)}
+    assert decode_cursor(encode_cursor(doc, SORT), SORT) == [doc["created_at"], doc["_id"]]
+    assert encode_cursor({"_id": ObjectId()}, SORT) is None
+
+
+def test_coerce_datetime():
+    oid = ObjectId.from_datetime(datetime(2023, 5, 6))
+    assert coerce_datetime("2024-01-02T03:04:05+01:00") == datetime(2024, 1, 2, 2, 4, 5)
+    assert coerce_datetime("not a date", oid) == datetime(2023, 5, 6)
+    assert coerce_datetime(None, oid) == datetime(2023, 5, 6)
+    assert coerce_datetime(None) is None
+
+
+def test_legacy_sort_filter():
+    assert legacy_sort_filter() == {"created_at": {"$not": {"$type": "date"}}}
+
+
+def _token(values) -> str:
+    return urlsafe_b64encode(json_util.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_decode_cursor_rejects_forged_tokens():
+    oid = ObjectId()
+    assert decode_cursor(None, SORT) is None
+    assert decode_cursor("not base64!", SORT) is None
+    assert decode_cursor(_token({"created_at": 1}), SORT) is None
+    assert decode_cursor(_token([1]), SORT) is None  # wrong number of keys
+    # Operators smuggled in as values must not reach the query
+    assert decode_cursor(_token([{"$ne": None}, oid]), SORT) is None
+    assert decode_cursor(_token([[1, 2], oid]), SORT) is None
+    assert decode_cursor(_token([None, oid]), SORT) is None
+
+
+def test_keyset_filter_is_lexicographic():
+    when, oid = datetime(2024, 1, 1), ObjectId()
+    assert keyset_filter([when, oid], SORT) == {
+        "$or": [
+            {"created_at": {"$lt": when}},
+            {"created_at": when, "_id": {"$lt": oid}},
+        ]
+    }
+    backwards = keyset_filter([when, oid], SORT, backwards=True)
+    assert backwards["$or"][1] == {"created_at": when, "_id": {"$gt": oid}}
+
+
+def test_keyset_filter_mixed_directions():
+    sort = [("score", -1), ("name", 1)]
+    assert keyset_filter([2.5, "b"], sort)["$or"] == [
+        {"score": {"$lt": 2.5}},
+        {"score": 2.5, "name": {"$gt": "b"}},
+    ]
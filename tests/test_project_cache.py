@@ -0,0 +1,26 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from project_cache import ProjectCache
+
+
+def test_bump_reaches_other_workers():
+    async def scenario():
+        db = AsyncMongoMockClient()["portfolio_test"]
+        # Two workers: separate in-process caches over the same database
+        first = ProjectCache(db.projects, db.cache_versions, version_ttl=0)
+        second = ProjectCache(db.projects, db.cache_versions, version_ttl=60)
+
+        assert await second.get_projects() == []
+        await db.projects.insert_one({"title": "New"})
+        await first.bump()
+
+        # second trusts its version until the TTL passes
+        assert await second.get_projects() == []
+        second.version_ttl = 0
+        projects = await second.get_projects()
+        assert [p["title"] for p in projects] == ["New"]
+        assert await second.current_version() == first.version == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+from purge import purge_css
+
+CSS = """/*! license */
+/* dropped comment */
+.btn{color:red}
+.unused{color:blue}
+.btn.unused,.card > .btn{margin:0}
+.btn:not(.unused){padding:0}
+.fade{opacity:0}
+a[data-aos="fade-up"]{opacity:0}
+a[data-aos="zoom-in"]{opacity:0}
+@media (min-width: 768px){.unused{display:none}.card{display:block}}
+@media print{.unused{display:none}}
+@keyframes spin{to{transform:rotate(1turn)}}
+@keyframes unused-spin{to{transform:none}}
+.spinner{animation:spin 1s}
+@font-face{font-family:"Icons";src:url(icons.woff)}
+"""
+
+USED = {"btn", "card", "a", "data-aos", "fade-up", "html"}
+
+
+def test_purge_drops_unused_rules_and_selectors():
+    out = purge_css(CSS, USED)
+    assert "/*! license */" in out
+    assert "dropped comment" not in out
+    assert ".btn{color:red}" in out
+    assert ".unused{color:blue}" not in out
+    # A selector list keeps only the selectors that can match
+    assert ".card > .btn{margin:0}" in out
+    assert ".btn.unused" not in out
+    # Classes inside :not() do not need to be used
+    assert ".btn:not(.unused){padding:0}" in out
+    # data-aos attribute values are purged like classes
+    assert 'a[data-aos="fade-up"]' in out
+    assert "zoom-in" not in out
+
+
+def test_purge_keeps_safelisted_runtime_classes():
+    out = purge_css(CSS, USED)
+    assert ".fade{opacity:0}" in out  # added by Bootstrap's JS
+
+
+def test_purge_keeps_used_rules_in_media_blocks():
+    out = purge_css(CSS, USED)
+    assert "@media (min-width: 768px){\n.card{display:block}\n}" in out
+    assert "@media print" not in out  # nothing left inside
+
+
+def test_strict_purge_for_critical_css():
+    out = purge_css(CSS, USED, strict=True)
+    assert ".fade" not in out  # the safelist does not apply
+    assert ".spinner" not in out
+    # @keyframes and @font-face only survive when a kept rule uses them
+    assert "@keyframes" not in out
+    assert "@font-face" not in out
+
+    out = purge_css(CSS, USED | {"spinner"}, strict=True)
+    assert "@keyframes spin{" in out
+    assert "unused-spin" not in out
@@ -0,0 +1,64 @@
+from search import (
+    build_message_search,
+    _compile_advanced,
+    RECENT_SORT,
+    RELEVANCE_SORT,
+    REGEX_MODE,
+    SEARCH_FIELDS,
+    SEARCH_MAX_LENGTH,
+    TEXT_MODE,
+)
+
+
+def test_empty_search_lists_recent_messages():
+    assert build_message_search(None) == ({}, RECENT_SORT)
+    assert build_message_search("   ") == ({}, RECENT_SORT)
+
+
+def test_text_mode_strips_text_operators():
+    query, sort = build_message_search('"invoice" -spam')
+    assert query == {"$text": {"$search": "invoice spam"}}
+    assert sort == RELEVANCE_SORT
+
+
+def test_regex_mode_escapes_input():
+    query, sort = build_message_search("a.b(c", REGEX_MODE)
+    assert query == {
+        "$or": [{f: {"$regex": r"a\.b\(c", "$options": "i"}} for f in SEARCH_FIELDS]
+    }
+    assert sort == RECENT_SORT
+
+
+def test_search_is_capped():
+    query, _ = build_message_search("x" * (SEARCH_MAX_LENGTH + 50), REGEX_MODE)
+    assert len(query["$or"][0]["name"]["$regex"]) == SEARCH_MAX_LENGTH
+
+
+def test_advanced_field_phrase_and_regex():
+    search = 'subject:quote "web site" /inv[0-9]+/ -spam'
+    clauses, text_terms = _compile_advanced(search, TEXT_MODE)
+    assert clauses[0] == {"subject": {"$regex": "quote", "$options": "i"}}
+    assert clauses[1]["$or"][0] == {"name": {"$regex": "inv[0-9]+", "$options": "i"}}
+    assert text_terms == ['"web site"', "-spam"]
+
+
+def test_advanced_invalid_regex_is_matched_literally():
+    clauses, _ = _compile_advanced("/a(b/", REGEX_MODE)
+    assert clauses[0]["$or"][0]["name"]["$regex"] == r"a\(b"
+
+
+def test_advanced_unknown_field_is_a_literal_word():
+    clauses, text_terms = _compile_advanced("password:hunter2", REGEX_MODE)
+    assert clauses[0]["$or"][0]["name"]["$regex"] == "password:hunter2"
+    assert text_terms == []
+
+
+def test_advanced_query_combines_text_and_clauses():
+    query, sort = build_message_search("email:gmail invoice", TEXT_MODE, advanced=True)
+    assert query == {
+        "$and": [
+            {"$text": {"$search": "invoice"}},
+            {"email": {"$regex": "gmail", "$options": "i"}},
+        ]
+    }
+    assert sort == RELEVANCE_SORT
@@ -0,0 +1,71 @@
+import os
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from media import store_upload
+from storage import S3Storage
+from uploads import StreamedUpload
+
+BUCKET = "portfolio-media"
+KEY = "ab/ab/" + "ab" * 32 + ".png"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        yield S3Storage(BUCKET, prefix="uploads/", region="us-east-1")
+
+
+def _upload(tmp_path, data=b"png bytes"):
+    path = tmp_path / "upload.part"
+    path.write_bytes(data)
+    upload = StreamedUpload("a.png", "image/png", str(path))
+    upload.sha256 = "ab" * 32
+    return upload
+
+
+def test_save_exists_and_delete(s3, tmp_path):
+    upload = _upload(tmp_path)
+    assert not s3.exists(KEY)
+    s3.save_file(KEY, upload.tmp_path, "image/png")
+    assert not os.path.exists(upload.tmp_path)  # the local file is consumed
+    assert s3.exists(KEY)
+
+    head = s3.client.head_object(Bucket=BUCKET, Key="uploads/" + KEY)
+    assert head["ContentType"] == "image/png"
+    assert "immutable" in head["CacheControl"]
+
+    s3.delete(KEY)
+    assert not s3.exists(KEY)
+    assert s3.modified(KEY) is None
+
+
+def test_store_upload_dedups_and_touch_keeps_headers(s3, tmp_path):
+    assert store_upload(_upload(tmp_path), s3) == (KEY, True)
+    before = s3.modified(KEY)
+
+    upload = _upload(tmp_path)
+    assert store_upload(upload, s3) == (KEY, False)
+    assert not os.path.exists(upload.tmp_path)  # the duplicate is dropped
+    assert s3.modified(KEY) >= before
+
+    head = s3.client.head_object(Bucket=BUCKET, Key="uploads/" + KEY)
+    assert head["ContentType"] == "image/png"
+    assert "immutable" in head["CacheControl"]
+    assert not s3.touch("ab/ab/missing.png")
+
+
+def test_urls(s3):
+    assert s3.url(KEY) == f"/media/{KEY}"
+    signed = s3.signed_url(KEY)
+    assert BUCKET in signed and f"/uploads/{KEY}?" in signed
+    assert "Signature=" in signed and "Expires=" in signed
+
+    public = S3Storage(BUCKET, prefix="uploads/", public_url="https://cdn.example.com/")
+    assert public.url(KEY) == f"https://cdn.example.com/uploads/{KEY}"
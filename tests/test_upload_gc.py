@@ -0,0 +1,75 @@
+import os
+import time
+
+import pytest
+
+from media import shard_path
+from upload_gc import find_orphans, reclaim, referenced_files
+
+LIVE = "ab" * 32
+DEAD = "cd" * 32
+YOUNG = "ef" * 32
+DAY = 24 * 3600
+
+
+def _write(upload_dir, relpath, size, age=2 * DAY):
+    path = upload_dir / relpath
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    upload_dir = tmp_path / "uploads"
+    _write(upload_dir, shard_path(f"{LIVE}.jpg"), 10)
+    _write(upload_dir, shard_path(f"{LIVE}-320.webp"), 20)
+    _write(upload_dir, "legacy.png", 30)
+    _write(upload_dir, ".upload-pending.part", 40)
+    dead = _write(upload_dir, shard_path(f"{DEAD}.jpg"), 50)
+    part = _write(upload_dir, ".upload-aborted.part", 60)
+    _write(upload_dir, shard_path(f"{YOUNG}.jpg"), 70, age=60)
+
+    projects = [
+        # Variants are not listed yet: the job may still be building them
+        {
+            "image_url": f"/static/uploads/{shard_path(LIVE + '.jpg')}",
+            "image_sha256": LIVE,
+        },
+        {"image_url": "/static/uploads/legacy.png"},
+        {"image_upload": {"tmp_path": str(upload_dir / ".upload-pending.part")}},
+    ]
+    filenames, digests = referenced_files(projects)
+    orphans = find_orphans(str(upload_dir), filenames, digests, DAY)
+    return tmp_path, orphans, {dead: 50, part: 60}
+
+
+def test_find_orphans_keeps_referenced_and_young_files(tree):
+    _, orphans, expected = tree
+    assert dict(orphans) == expected
+
+
+def test_reclaim_deletes_and_reports_bytes(tree):
+    tmp_path, orphans, expected = tree
+    assert reclaim(orphans, "delete") == (2, 110)
+    assert not any(os.path.exists(path) for path in expected)
+    # Already gone: nothing is counted twice
+    assert reclaim(orphans, "delete") == (0, 0)
+
+
+def test_reclaim_quarantines_and_reports_bytes(tree):
+    tmp_path, orphans, expected = tree
+    quarantine = tmp_path / "quarantine"
+    assert reclaim(orphans, "quarantine", str(quarantine)) == (2, 110)
+    assert sorted(os.listdir(quarantine)) == sorted(
+        os.path.basename(path) for path in expected
+    )
+    assert not any(os.path.exists(path) for path in expected)
+
+
+def test_reclaim_rejects_unknown_mode(tree):
+    _, orphans, _ = tree
+    with pytest.raises(ValueError):
+        reclaim(orphans, "shred")
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import stat
+
+import pytest
+from starlette.requests import Request
+
+from uploads import MAX_FORM_FIELDS, UploadError, receive_upload
+
+BOUNDARY = "testboundary"
+
+
+def _body(fields: dict, file_bytes: bytes = None) -> bytes:
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+        for name, value in fields.items()
+    ]
+    body = "".join(parts).encode()
+    if file_bytes is not None:
+        body += (
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="image"; '
+            'filename="a.png"\r\nContent-Type: image/png\r\n\r\n'
+        ).encode() + file_bytes + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _request(body: bytes, chunk_size: int = 1024) -> Request:
+    """A request streamed in chunks with no Content-Length header."""
+    chunks = [body[i : i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive():
+        chunk = chunks.pop(0)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    content_type = f"multipart/form-data; boundary={BOUNDARY}".encode()
+    scope = {"type": "http", "method": "POST", "headers": [(b"content-type", content_type)]}
+    return Request(scope, receive)
+
+
+def _receive(body: bytes, tmp_path, max_bytes: int = 4096):
+    return asyncio.run(receive_upload(_request(body), "image", str(tmp_path), max_bytes))
+
+
+def test_upload_is_streamed_to_a_readable_temp_file(tmp_path):
+    fields, upload = _receive(_body({"title": "T"}, b"x" * 3000), tmp_path)
+    assert fields == {"title": "T"}
+    assert upload.size == 3000
+    assert stat.S_IMODE(os.stat(upload.tmp_path).st_mode) == 0o644
+
+
+def test_body_budget_applies_without_content_length(tmp_path):
+    # Each field is under MAX_FIELD_BYTES, but together they exceed the budget
+    fields = {f"f{i}": "y" * 15000 for i in range(MAX_FORM_FIELDS - 1)}
+    with pytest.raises(UploadError) as exc:
+        _receive(_body(fields, b"x" * 100), tmp_path)
+    assert exc.value.status_code == 413
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".upload-")]
+
+
+def test_field_count_is_limited(tmp_path):
+    fields = {f"f{i}": "y" for i in range(MAX_FORM_FIELDS + 1)}
+    with pytest.raises(UploadError) as exc:
+        _receive(_body(fields), tmp_path)
+    assert exc.value.detail == "Too many form fields."
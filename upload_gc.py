@@ -0,0 +1,156 @@
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+import asyncio
+import os
+import shutil
+import time
+import traceback
+
+from media import is_content_addressed
+
+load_dotenv()
+
+# Files younger than this are never collected: they may belong to an upload
+# whose project document has not been written yet, or to a running image job.
+UPLOAD_GC_GRACE_HOURS = float(os.getenv("UPLOAD_GC_GRACE_HOURS", 24))
+
+# "quarantine" moves orphans aside (outside /static), "delete" unlinks them
+UPLOAD_GC_MODE = os.getenv("UPLOAD_GC_MODE", "quarantine").lower()
+UPLOAD_GC_MODES = ("quarantine", "delete")
+UPLOAD_QUARANTINE_DIR = os.getenv("UPLOAD_QUARANTINE_DIR", "upload_quarantine")
+
+# Run the collector in the app every N hours; 0 disables the scheduled task
+UPLOAD_GC_INTERVAL_HOURS = float(os.getenv("UPLOAD_GC_INTERVAL_HOURS", 0))
+
+# Only these fields are needed to know which files are still in use
+REFERENCE_PROJECTION = {
+    "image_url": 1,
+    "image_variants": 1,
+    "image_sha256": 1,
+    "image_upload.tmp_path": 1,
+}
+
+
+# -----------------------------
+# References
+# -----------------------------
+def referenced_files(projects) -> tuple[set, set]:
+    """
+    Collect what the given project documents still point at.
+    Returns (filenames, digests). Any file named after a live digest is
+    kept, which also covers variants of jobs that are still pending.
+    """
+    filenames, digests = set(), set()
+    for project in projects:
+        urls = [project.get("image_url") or ""]
+        for variants in (project.get("image_variants") or {}).values():
+            urls.extend(v["url"] for v in variants)
+        filenames.update(url.rsplit("/", 1)[-1] for url in urls if url)
+        if project.get("image_sha256"):
+            digests.add(project["image_sha256"])
+        if project.get("image_upload"):
+            # Temp file of an upload whose image job has not run yet
+            filenames.add(os.path.basename(project["image_upload"]["tmp_path"]))
+    return filenames, digests
+
+
+def _is_referenced(name: str, filenames: set, digests: set) -> bool:
+    if name in filenames:
+        return True
+    return is_content_addressed(name) and name[:64] in digests
+
+
+# -----------------------------
+# Scan / Reclaim
+# -----------------------------
+def find_orphans(upload_dir: str, filenames: set, digests: set, grace_seconds: float):
+    """
+    Scan upload_dir (and its shard directories) with os.scandir and return
+    [(path, size)] for files no project references and that are older than
+    the grace period. Leftover .upload-*.part temp files from aborted
+    uploads are included.
+    """
+    cutoff = time.time() - grace_seconds
+    orphans = []
+    pending = [upload_dir]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if _is_referenced(entry.name, filenames, digests):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime > cutoff:
+                    continue
+                orphans.append((entry.path, stat.st_size))
+    return orphans
+
+
+def reclaim(
+    orphans, mode: str = UPLOAD_GC_MODE, quarantine_dir: str = UPLOAD_QUARANTINE_DIR
+):
+    """Delete or quarantine the given orphans. Returns (files, bytes) reclaimed."""
+    if mode not in UPLOAD_GC_MODES:
+        raise ValueError(f"Unknown GC mode '{mode}'. Use one of {UPLOAD_GC_MODES}.")
+    if mode == "quarantine":
+        os.makedirs(quarantine_dir, exist_ok=True)
+
+    files = reclaimed = 0
+    for path, size in orphans:
+        try:
+            if mode == "delete":
+                os.remove(path)
+            else:
+                shutil.move(path, os.path.join(quarantine_dir, os.path.basename(path)))
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            print(f"[WARN] Could not {mode} {path}:", e)
+            continue
+        files += 1
+        reclaimed += size
+    return files, reclaimed
+
+
+def format_bytes(size: float) -> str:
+    if size < 1024:
+        return f"{size} B"
+    for unit in ("KB", "MB", "GB"):
+        size /= 1024
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}"
+
+
+# -----------------------------
+# Scheduled Collection
+# -----------------------------
+async def collect_uploads(collection, upload_dir: str, mode: str = UPLOAD_GC_MODE):
+    """One GC pass against an async (Motor) projects collection."""
+    projects = await collection.find({}, REFERENCE_PROJECTION).to_list(None)
+    filenames, digests = referenced_files(projects)
+
+    orphans = await run_in_threadpool(
+        find_orphans, upload_dir, filenames, digests, UPLOAD_GC_GRACE_HOURS * 3600
+    )
+    files, reclaimed = await run_in_threadpool(reclaim, orphans, mode)
+    if files:
+        print(f"[INFO] Upload GC ({mode}): {files} orphan(s), {format_bytes(reclaimed)} reclaimed.")
+    return files, reclaimed
+
+
+async def run_upload_gc(collection, upload_dir: str, interval_hours: float):
+    """
+    Background loop started from the app when UPLOAD_GC_INTERVAL_HOURS > 0.
+    Each worker process runs its own loop; passes are idempotent.
+    """
+    while True:
+        try:
+            await collect_uploads(collection, upload_dir)
+        except Exception as e:
+            print("[ERROR] Upload GC pass failed:", e)
+            traceback.print_exc()
+        await asyncio.sleep(interval_hours * 3600)
@@ -0,0 +1,238 @@
+from fastapi import Request
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+import hashlib
+import os
+import tempfile
+
+load_dotenv()
+
+# Upper bound for a single uploaded image
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", 10)) * 1024 * 1024
+
+# Allowance for the text fields and multipart framing around the file
+MAX_FORM_OVERHEAD = 64 * 1024
+MAX_FIELD_BYTES = 16 * 1024
+MAX_FORM_FIELDS = 16
+
+ALLOWED_IMAGE_TYPES = ["image/png", "image/jpeg", "image/jpg", "image/webp"]
+
+
+class UploadError(Exception):
+    """The upload was rejected; status_code/detail map onto an HTTPException."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _too_large(max_bytes: int) -> str:
+    return f"Upload too large. Maximum size is {max_bytes // (1024 * 1024)} MB."
+
+
+# -----------------------------
+# Received File
+# -----------------------------
+class StreamedUpload:
+    """A file part that was streamed to a temp file in the storage scratch dir."""
+
+    __slots__ = ("filename", "content_type", "tmp_path", "size", "sha256")
+
+    def __init__(self, filename: str, content_type: str, tmp_path: str):
+        self.filename = filename
+        self.content_type = content_type
+        self.tmp_path = tmp_path
+        self.size = 0
+        self.sha256 = None
+
+    def to_document(self) -> dict:
+        """What a background job needs to pick the temp file up again."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_document(cls, doc: dict) -> "StreamedUpload":
+        upload = cls(doc["filename"], doc["content_type"], doc["tmp_path"])
+        upload.size = doc["size"]
+        upload.sha256 = doc["sha256"]
+        return upload
+
+    def discard(self) -> None:
+        try:
+            os.unlink(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+# -----------------------------
+# Streaming Multipart Reader
+# -----------------------------
+class _StreamingFormReader:
+    """
+    Parse a multipart body chunk by chunk as it arrives.
+
+    Text fields are kept in memory (capped at MAX_FIELD_BYTES each and
+    MAX_FORM_FIELDS in total). The single file field is hashed and written
+    to a temp file in the same pass, and the read is aborted as soon as it
+    grows past max_bytes, or the whole body past max_bytes +
+    MAX_FORM_OVERHEAD (Content-Length may be absent or wrong). Nothing is
+    spooled first.
+    """
+
+    def __init__(self, file_field: str, dest_dir: str, max_bytes: int):
+        self.file_field = file_field
+        self.dest_dir = dest_dir
+        self.max_bytes = max_bytes
+
+        self.fields = {}
+        self.upload = None
+        self._hasher = hashlib.sha256()
+        self._file = None
+        self._pending = []
+        self._parts = 0
+
+        self._header_name = b""
+        self._header_value = b""
+        self._headers = {}
+        self._name = None
+        self._data = b""
+        self._is_file = False
+
+    # Parser callbacks (synchronous; file writes are flushed in read())
+    def on_part_begin(self):
+        self._parts += 1
+        if self._parts > MAX_FORM_FIELDS:
+            raise UploadError(413, "Too many form fields.")
+        self._headers = {}
+        self._name = None
+        self._data = b""
+        self._is_file = False
+
+    def on_header_field(self, data, start, end):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data, start, end):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        disposition = self._headers.get(b"content-disposition", b"")
+        _, options = parse_options_header(disposition)
+        self._name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" not in options:
+            return
+
+        if self._name != self.file_field or self.upload is not None:
+            raise UploadError(400, "Unexpected file field in upload.")
+
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1")
+        content_type = content_type.split(";")[0].strip().lower()
+        if content_type not in ALLOWED_IMAGE_TYPES:
+            raise UploadError(
+                400, "Unsupported file type. Use PNG, JPG, JPEG, or WEBP."
+            )
+
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.dest_dir, prefix=".upload-", suffix=".part"
+        )
+        os.chmod(tmp_path, 0o644)  # mkstemp creates files readable by the owner only
+        self._file = os.fdopen(fd, "wb")
+        self.upload = StreamedUpload(
+            options[b"filename"].decode("utf-8", "replace"), content_type, tmp_path
+        )
+        self._is_file = True
+
+    def on_part_data(self, data, start, end):
+        chunk = data[start:end]
+        if self._is_file:
+            self.upload.size += len(chunk)
+            if self.upload.size > self.max_bytes:
+                raise UploadError(413, _too_large(self.max_bytes))
+            self._hasher.update(chunk)
+            self._pending.append(chunk)
+        else:
+            self._data += chunk
+            if len(self._data) > MAX_FIELD_BYTES:
+                raise UploadError(413, f"Form field '{self._name}' is too large.")
+
+    def on_part_end(self):
+        if not self._is_file:
+            self.fields[self._name] = self._data.decode("utf-8", "replace")
+
+    async def read(self, request: Request):
+        """Consume the request body. Returns (fields, StreamedUpload or None)."""
+        _, params = parse_options_header(request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise UploadError(400, "Expected a multipart/form-data body.")
+
+        parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self.on_part_begin,
+                "on_part_data": self.on_part_data,
+                "on_part_end": self.on_part_end,
+                "on_header_field": self.on_header_field,
+                "on_header_value": self.on_header_value,
+                "on_header_end": self.on_header_end,
+                "on_headers_finished": self.on_headers_finished,
+            },
+        )
+
+        budget = self.max_bytes + MAX_FORM_OVERHEAD
+        received = 0
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > budget:
+                    raise UploadError(413, _too_large(self.max_bytes))
+                parser.write(chunk)
+                await self._flush()
+            parser.finalize()
+            await self._flush()
+        except BaseException:
+            self._close()
+            if self.upload is not None:
+                self.upload.discard()
+            raise
+
+        self._close()
+        if self.upload is not None:
+            self.upload.sha256 = self._hasher.hexdigest()
+        return self.fields, self.upload
+
+    async def _flush(self):
+        """Write buffered file bytes without blocking the event loop."""
+        if self._pending:
+            data = b"".join(self._pending)
+            self._pending.clear()
+            await run_in_threadpool(self._file.write, data)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+async def receive_upload(
+    request: Request, file_field: str, dest_dir: str, max_bytes: int = MAX_UPLOAD_BYTES
+):
+    """
+    Stream a multipart upload straight to disk.
+
+    Requests whose Content-Length already exceeds the limit are rejected
+    before any of the body is read. Returns (fields, StreamedUpload); the
+    caller must hand the temp file to storage or discard() it.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        if int(content_length) > max_bytes + MAX_FORM_OVERHEAD:
+            raise UploadError(413, _too_large(max_bytes))
+
+    reader = _StreamingFormReader(file_field, dest_dir, max_bytes)
+    return await reader.read(request)